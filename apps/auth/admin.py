@@ -15,7 +15,7 @@ class UserAdmin(BaseUserAdmin):
         (None, {'fields': ('email', 'password')}),
         ('Personal info', {'fields': ('full_name',)}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'role')}),
-        ('Important dates', {'fields': ('last_login', 'date_joined', 'created_at', 'updated_at')}),
+        ('Important dates', {'fields': ('last_login', 'date_joined', 'tokens_revoked_at', 'created_at', 'updated_at')}),
     )
     
     add_fieldsets = (
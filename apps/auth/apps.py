@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.auth'
-    label = 'custom_auth'  
\ No newline at end of file
+    label = 'custom_auth'  
+
+    def ready(self):
+        from apps.auth import signals  # noqa: F401
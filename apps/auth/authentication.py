@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.auth.models import User
+from apps.auth.revocation import revoked_tokens
+from apps.auth.tokens import USER_CLAIMS
+
+# Account state that can change while a token is valid, cached instead of read per request
+USER_STATE_FIELDS = ('is_active', 'is_staff', 'is_superuser', 'role', 'tokens_revoked_at')
+
+
+def user_state_key(user_id):
+    return f"auth:user-state:{user_id}"
+
+
+def get_user_state(user_id):
+    """
+    `USER_STATE_FIELDS` of the user from the shared cache, loaded with one
+    query on a miss. Returns None for a user that does not exist (cached too,
+    so a token of a deleted user doesn't query on every request).
+    """
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*USER_STATE_FIELDS).first() or {}
+        cache.set(key, state, settings.AUTH_USER_STATE_CACHE_TIMEOUT)
+    return state or None
+
+
+def invalidate_user_state(user_id):
+    cache.delete(user_state_key(user_id))
+
+
+def ensure_token_is_active(token, tokens_revoked_at=None):
+    """
+    Raise `TokenError` if the token was revoked (logout) or issued before its
+    user was signed out everywhere.
+    """
+    if tokens_revoked_at is not None and token['iat'] < tokens_revoked_at.timestamp():
+        raise TokenError(_("Token has been revoked"))
+    if revoked_tokens.is_revoked(token[api_settings.JTI_CLAIM]):
+        raise TokenError(_("Token has been revoked"))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds `request.user` from the token's claims
+    instead of loading the users row.
+
+    The user is a `User` instance with its id, `USER_CLAIMS` and the cached
+    `USER_STATE_FIELDS` set and every other field deferred, as if loaded with
+    `.only()`: comparisons, foreign key assignments and filters work as usual
+    and a view reading another field costs one query. The cached state rejects
+    inactive users and tokens whose role is out of date. Tokens issued without
+    the claims fall back to loading the user. Revoked tokens are rejected
+    either way.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            user = super().get_user(validated_token)
+            self.ensure_token_is_active(validated_token, user.tokens_revoked_at)
+            return user
+
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not state['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if state['role'] != validated_token['role']:
+            raise AuthenticationFailed(_("The user's role has changed."), code="role_changed")
+        self.ensure_token_is_active(validated_token, state.get('tokens_revoked_at'))
+
+        data = {**state, 'id': user_id, **{claim: validated_token[claim] for claim in USER_CLAIMS}}
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in data]
+        return User.from_db(DEFAULT_DB_ALIAS, field_names, [data[name] for name in field_names])
+
+    def ensure_token_is_active(self, validated_token, tokens_revoked_at):
+        try:
+            ensure_token_is_active(validated_token, tokens_revoked_at)
+        except TokenError as e:
+            raise AuthenticationFailed(e.args[0], code="token_revoked")
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    target_class = 'apps.auth.authentication.StatelessJWTAuthentication'
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from apps.auth.hashing import password_checks
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    `ModelBackend` whose password check runs on the bounded `password_checks`
+    pool. A hash made by a hasher other than the first in `PASSWORD_HASHERS`
+    (or with outdated parameters) is redone with it after a successful check.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            password_checks.verify(password, None)
+            return None
+
+        is_correct, must_update = password_checks.verify(password, user.password)
+        if not is_correct:
+            return None
+        if must_update:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import Throttled
+
+
+def verify_password(password, encoded):
+    """
+    Check `password` against the `encoded` hash, returning `(is_correct,
+    must_update)`, where `must_update` means the hash should be redone with the
+    preferred hasher. Without a hash (unknown user) the preferred hasher runs
+    anyway, so the response time doesn't reveal which emails exist.
+    """
+    if encoded is None:
+        make_password(password)
+        return False, False
+    outdated = []
+    is_correct = check_password(password, encoded, setter=outdated.append)
+    return is_correct, bool(outdated)
+
+
+def hash_passwords(passwords):
+    """`make_password` for each of `passwords`, for process pools (bulk imports)."""
+    return [make_password(password) for password in passwords]
+
+
+class PasswordCheckPool:
+    """
+    Runs password hash checks on `LOGIN_HASH_WORKERS` threads so a burst of
+    logins uses at most that many CPUs and leaves the rest to other requests
+    (the hashers release the GIL). Up to `LOGIN_HASH_MAX_QUEUE` checks wait
+    for a thread, at most `LOGIN_HASH_QUEUE_TIMEOUT` seconds; beyond that
+    logins are throttled with a 429. The threads only hash, the caller does any
+    database work. With `LOGIN_HASH_WORKERS = 0` checks run in the calling
+    thread. Counters and wait times are kept per process for `stats()`.
+    """
+    recent_waits = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._counters = Counter()
+        self._waits = deque(maxlen=self.recent_waits)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix='password-check'
+                )
+                self._slots = threading.BoundedSemaphore(settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_MAX_QUEUE)
+            return self._executor, self._slots
+
+    def shutdown(self):
+        """Stop the threads; the next check starts new ones from the current settings."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _run(self, password, encoded, queued_at):
+        with self._lock:
+            self._counters['started'] += 1
+            self._waits.append(time.monotonic() - queued_at)
+        try:
+            return verify_password(password, encoded)
+        finally:
+            self._count('completed')
+
+    def _throttled(self):
+        return Throttled(wait=1, detail="Too many logins in progress, try again shortly.")
+
+    def verify(self, password, encoded):
+        if settings.LOGIN_HASH_WORKERS <= 0:
+            return verify_password(password, encoded)
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            self._count('rejected')
+            raise self._throttled()
+        try:
+            self._count('submitted')
+            future = executor.submit(self._run, password, encoded, time.monotonic())
+            try:
+                return future.result(timeout=settings.LOGIN_HASH_QUEUE_TIMEOUT)
+            except FuturesTimeoutError:
+                self._count('cancelled' if future.cancel() else 'timed_out')
+                raise self._throttled()
+        finally:
+            slots.release()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            waits = sorted(self._waits)
+        started = counters.get('started', 0)
+        return {
+            'workers': settings.LOGIN_HASH_WORKERS,
+            'max_queue': settings.LOGIN_HASH_MAX_QUEUE,
+            'in_flight': started - counters.get('completed', 0),
+            'queued': counters.get('submitted', 0) - started - counters.get('cancelled', 0),
+            'completed': counters.get('completed', 0),
+            'rejected': counters.get('rejected', 0),
+            'timed_out': counters.get('timed_out', 0) + counters.get('cancelled', 0),
+            'wait_ms_p50': round(waits[len(waits) // 2] * 1000, 1) if waits else None,
+            'wait_ms_p95': round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else None,
+            'wait_ms_max': round(waits[-1] * 1000, 1) if waits else None,
+        }
+
+
+password_checks = PasswordCheckPool()
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core import signing
+
+_SALT = 'apps.auth.invites'
+
+
+def make_invite_token(email):
+    """Signed, timestamped token that lets the owner of `email` choose a password."""
+    return signing.dumps(email, salt=_SALT, compress=True)
+
+
+def read_invite_token(token):
+    """The email of a valid token; raises `signing.BadSignature` (or `SignatureExpired`)."""
+    return signing.loads(token, salt=_SALT, max_age=settings.INVITE_TOKEN_MAX_AGE)
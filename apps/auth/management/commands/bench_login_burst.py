@@ -0,0 +1,165 @@
+import http.client
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from apps.auth.hashing import password_checks
+from apps.auth.models import User, Role
+from apps.auth.tokens import ClaimsRefreshToken
+from apps.courses.models.course import Course
+
+PASSWORD = 'bench-password-123'
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadedWSGIServer):
+    # Room for the whole burst in the listen backlog
+    request_queue_size = 1024
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else float('nan')
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the API from a threaded WSGI server in this process, fire a burst of concurrent logins at it and '
+        'report the latency of GET /api/courses/ before and during the burst, with password checks in the request '
+        'threads and on the bounded pool. Seeds users with the preferred password hasher and deletes them after.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=settings.LOGIN_HASH_WORKERS, help='Pool threads.')
+        parser.add_argument('--idle-seconds', type=float, default=2.0, help='Sampling time before the burst.')
+        parser.add_argument(
+            '--queue-timeout', type=int, default=600,
+            help='LOGIN_HASH_QUEUE_TIMEOUT for the run; the default lets every login of the burst through.',
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of deleting it.')
+
+    def handle(self, *args, **options):
+        instructor = User.objects.create_user(
+            email=f'bench-login-{time.time_ns()}@example.com', full_name='Benchmark Instructor', role=Role.INSTRUCTOR
+        )
+        prefix = instructor.email.split('@')[0]
+        try:
+            self._run(instructor, prefix, options)
+        finally:
+            if not options['keep']:
+                Course.objects.filter(instructor=instructor).delete()
+                User.objects.filter(email__startswith=prefix).delete()
+
+    def _run(self, instructor, prefix, options):
+        for i in range(5):
+            Course.objects.create(title=f'Login benchmark {i}', short_description='Synthetic', instructor=instructor,
+                                  status='published')
+        for hasher in ('scrypt', 'pbkdf2_sha256'):
+            encoded = make_password(PASSWORD, hasher=hasher)
+            started = time.perf_counter()
+            check_password(PASSWORD, encoded)
+            self.stdout.write(f"One {hasher} check: {(time.perf_counter() - started) * 1000:,.0f} ms")
+        password = make_password(PASSWORD)
+        students = User.objects.bulk_create([
+            User(email=f'{prefix}-{i}@example.com', full_name=f'Student {i}', role=Role.STUDENT, password=password)
+            for i in range(options['logins'] + 1)
+        ])
+        browsing_token = str(ClaimsRefreshToken.for_user(students[0]).access_token)
+        self.stdout.write(
+            f"Hasher {settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}, {options['logins']} logins, "
+            f"pool of {options['workers']} thread(s) vs checks in the request threads"
+        )
+
+        server = _Server(('127.0.0.1', 0), _QuietHandler)
+        server.set_app(get_wsgi_application())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            for label, workers in [('request threads', 0), (f'pool of {options["workers"]}', options['workers'])]:
+                with override_settings(
+                    LOGIN_HASH_WORKERS=workers,
+                    LOGIN_HASH_MAX_QUEUE=options['logins'],
+                    LOGIN_HASH_QUEUE_TIMEOUT=options['queue_timeout'],
+                ):
+                    password_checks.shutdown()
+                    self._scenario(label, server.server_address[1], browsing_token, students[1:], options)
+        finally:
+            password_checks.shutdown()
+            server.shutdown()
+            server.server_close()
+
+    def _request(self, port, method, path, body=None, headers=None, timeout=60):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            response.read()
+            return response.status, time.perf_counter() - started
+        except OSError as e:
+            return type(e).__name__, time.perf_counter() - started
+        finally:
+            connection.close()
+
+    def _scenario(self, label, port, browsing_token, students, options):
+        samples = []
+        stop = threading.Event()
+
+        def browse():
+            headers = {'Authorization': f'Bearer {browsing_token}'}
+            while not stop.is_set():
+                samples.append((time.perf_counter(), *self._request(port, 'GET', '/api/courses/', headers=headers)))
+
+        browser = threading.Thread(target=browse)
+        browser.start()
+        time.sleep(options['idle_seconds'])
+
+        logins = []
+        gate = threading.Barrier(len(students) + 1)
+
+        def login(student):
+            body = json.dumps({'email': student.email, 'password': PASSWORD})
+            gate.wait()
+            logins.append(self._request(
+                port, 'POST', '/api/auth/login/', body, {'Content-Type': 'application/json'},
+                timeout=options['queue_timeout'] + 60,
+            ))
+
+        threads = [threading.Thread(target=login, args=(student,)) for student in students]
+        for login_thread in threads:
+            login_thread.start()
+        gate.wait()
+        burst_started = time.perf_counter()
+        for login_thread in threads:
+            login_thread.join()
+        burst_ended = time.perf_counter()
+        stop.set()
+        browser.join()
+
+        idle = [latency for at, _, latency in samples if at < burst_started]
+        during = [latency for at, _, latency in samples if burst_started <= at < burst_ended]
+        statuses = {}
+        for code, _ in logins:
+            statuses[code] = statuses.get(code, 0) + 1
+        self.stdout.write(
+            f"{label}: burst took {burst_ended - burst_started:.1f}s, logins {statuses}, "
+            f"login p50 {_percentile([latency for _, latency in logins], 0.5):,.0f} ms "
+            f"p99 {_percentile([latency for _, latency in logins], 0.99):,.0f} ms"
+        )
+        self.stdout.write(
+            f"  GET /api/courses/ idle p50 {_percentile(idle, 0.5):,.1f} ms p99 {_percentile(idle, 0.99):,.1f} ms; "
+            f"during burst p50 {_percentile(during, 0.5):,.1f} ms p99 {_percentile(during, 0.99):,.1f} ms "
+            f"({len(during)} requests)"
+        )
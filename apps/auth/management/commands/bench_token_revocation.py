@@ -0,0 +1,61 @@
+import random
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.auth.revocation import BloomFilter
+
+
+def _jtis(count, rng):
+    # Same shape as simplejwt's uuid4().hex JTIs
+    return (f'{rng.getrandbits(128):032x}' for _ in range(count))
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the token revocation Bloom filter with random JTIs and report its memory use, the memory a Python '
+        'set of the same JTIs would take, and the false-positive rate and lookup time for tokens not in it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=10_000_000, help='Revoked tokens in the filter.')
+        parser.add_argument('--probes', type=int, default=1_000_000, help='Lookups of tokens that are not revoked.')
+        parser.add_argument('--error-rate', type=float, default=settings.TOKEN_REVOCATION_FILTER_ERROR_RATE)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        tokens = options['tokens']
+
+        bloom = BloomFilter(tokens, options['error_rate'])
+        started = time.perf_counter()
+        for jti in _jtis(tokens, rng):
+            bloom.add(jti)
+        build = time.perf_counter() - started
+        self.stdout.write(
+            f"Bloom filter: {tokens:,} tokens in {bloom.nbytes / 2 ** 20:,.1f} MiB "
+            f"({bloom.size:,} bits, {bloom.hashes} hashes), built in {build:.1f}s"
+        )
+
+        # A set of the JTI strings, measured on a sample and scaled
+        sample = min(tokens, 100_000)
+        tracemalloc.start()
+        jtis = set(_jtis(sample, random.Random(options['seed'])))
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del jtis
+        self.stdout.write(f"Python set of the same JTIs: about {size * tokens / sample / 2 ** 20:,.0f} MiB")
+
+        # Fresh JTIs from another seed are (with overwhelming probability) not members
+        probe_rng = random.Random(options['seed'] + 1)
+        started = time.perf_counter()
+        false_positives = sum(jti in bloom for jti in _jtis(options['probes'], probe_rng))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Not-revoked lookups: {options['probes']:,} in {elapsed:.2f}s "
+            f"({elapsed / options['probes'] * 1e6:.2f} us each), {false_positives:,} false positives "
+            f"({false_positives / options['probes']:.4%}, target {options['error_rate']:.4%}); "
+            f"only those cost a database query"
+        )
@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+
+from apps.auth.hashing import hash_passwords
+from apps.auth.invites import make_invite_token
+from apps.auth.models import User, Role
+
+TEXT_FIELDS = ('email', 'full_name', 'role', 'password')
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users from a CSV (header row with email, full_name, role and optionally password) or NDJSON file '
+        '(one object per line with the same keys), streamed in chunks. Passwords are hashed in a process pool; '
+        'users without one, or all of them with --invite, get an unusable password and an invite token. Emails '
+        'that already exist are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension, else csv.')
+        parser.add_argument('--role', choices=Role.values, default=Role.STUDENT, help='For rows without a role.')
+        parser.add_argument('--invite', action='store_true', help='Ignore passwords in the file and invite everyone.')
+        parser.add_argument('--invites-out', help='Write email,token for every invited user to this CSV file.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per query, INSERT and pool task.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Hashing processes; 0 hashes in this process.',
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        source = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8-sig')
+        invites = open(options['invites_out'], 'w', newline='') if options['invites_out'] else None
+        self.invite_writer = csv.writer(invites) if invites else None
+        self.stats = Counter()
+        workers = options['workers']
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 and not options['invite'] else None
+        started = time.perf_counter()
+        try:
+            rows = self._valid_rows(self._read(source, fmt), options)
+            # Chunks being hashed; bounded so memory stays flat whatever the file size
+            pending = deque()
+            while chunk := list(islice(rows, options['chunk_size'])):
+                pending.append(self._prepare(chunk, pool))
+                if len(pending) > max(workers, 1) * 2:
+                    self._insert(*pending.popleft())
+            while pending:
+                self._insert(*pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if source is not sys.stdin:
+                source.close()
+            if invites:
+                invites.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Imported {self.stats['imported']:,} user(s) ({self.stats['invited']:,} invited) from "
+            f"{self.stats['read']:,} row(s) in {elapsed:.1f}s ({self.stats['read'] / elapsed:,.0f} rows/s); "
+            f"skipped {self.stats['existing']:,} existing and {self.stats['invalid']:,} invalid"
+        )
+
+    def _read(self, source, fmt):
+        if fmt == 'csv':
+            reader = csv.DictReader(source)
+            if not reader.fieldnames or 'email' not in reader.fieldnames:
+                raise CommandError("The CSV header must include an 'email' column")
+            for line, row in enumerate(reader, start=2):
+                yield line, row
+        else:
+            for line, text in enumerate(source, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError as e:
+                    row = {'error': f"invalid JSON ({e})"}
+                yield line, row if isinstance(row, dict) else {'error': 'not a JSON object'}
+
+    def _valid_rows(self, rows, options):
+        roles = {value.lower(): value for value in Role.values}
+        for line, row in rows:
+            self.stats['read'] += 1
+            # NDJSON values can be of any type; null counts as missing, anything else but text is rejected
+            error = row.get('error') or next((
+                f"{field} must be a string, not {row[field]!r}" for field in TEXT_FIELDS
+                if row.get(field) is not None and not isinstance(row[field], str)
+            ), None)
+            if not error:
+                email = User.objects.normalize_email((row.get('email') or '').strip())
+                role = roles.get((row.get('role') or options['role']).strip().lower())
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    error = f"invalid email {email!r}"
+            if not error and role is None:
+                error = f"unknown role {row.get('role')!r}"
+            if error:
+                self.stats['invalid'] += 1
+                if options['verbosity'] >= 1:
+                    self.stderr.write(f"Line {line}: {error}")
+                continue
+            password = None if options['invite'] else (row.get('password') or None)
+            yield User(email=email, full_name=(row.get('full_name') or '').strip(), role=role), password
+
+    def _existing(self, users):
+        return set(User.objects.filter(email__in=[user.email for user in users]).values_list('email', flat=True))
+
+    def _prepare(self, chunk, pool):
+        """Drop emails that exist or repeat, and start hashing the passwords of the rest."""
+        existing = self._existing([user for user, _ in chunk])
+        users, passwords = [], []
+        for user, password in chunk:
+            if user.email in existing:
+                self.stats['existing'] += 1
+                continue
+            existing.add(user.email)
+            users.append(user)
+            passwords.append(password)
+        to_hash = [password for password in passwords if password is not None]
+        if pool is not None and to_hash:
+            hashed = pool.submit(hash_passwords, to_hash)
+        else:
+            hashed = to_hash and hash_passwords(to_hash)
+        return users, passwords, hashed
+
+    def _insert(self, users, passwords, hashed):
+        hashed = iter(hashed.result() if hasattr(hashed, 'result') else hashed)
+        for user, password in zip(users, passwords):
+            user.password = make_password(None) if password is None else next(hashed)
+        # Emails registered since the chunk was read lose to the existing user
+        existing = self._existing(users)
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        for user, password in zip(users, passwords):
+            if user.email in existing:
+                self.stats['existing'] += 1
+                continue
+            self.stats['imported'] += 1
+            if password is None:
+                self.stats['invited'] += 1
+                if self.invite_writer:
+                    self.invite_writer.writerow([user.email, make_invite_token(user.email)])
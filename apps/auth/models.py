@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from apps.base.models import BaseModel
 
@@ -37,6 +38,8 @@ class User(AbstractUser, BaseModel):
     full_name = models.CharField(max_length=255)
     role = models.CharField(max_length=20, choices=Role.choices)
     # is_active is already provided by AbstractUser
+    # Tokens issued before this are rejected (forced sign-out)
+    tokens_revoked_at = models.DateTimeField(null=True, blank=True)
 
     username = None  # since we're using email
     
@@ -50,6 +53,10 @@ class User(AbstractUser, BaseModel):
         verbose_name_plural = 'Users'   
         ordering = ['-created_at']
         db_table = 'users'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='users_created_id_idx'),
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+        ]
 
     def __str__(self):
         return self.email
@@ -60,4 +67,18 @@ class User(AbstractUser, BaseModel):
     
     @property
     def is_instructor(self):
-        return self.role == Role.INSTRUCTOR
\ No newline at end of file
+        return self.role == Role.INSTRUCTOR
+
+
+class RevokedToken(models.Model):
+    """A refresh or access token revoked before it expires, by its `jti` claim."""
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'revoked_tokens'
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,143 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from apps.auth.models import RevokedToken
+
+
+class BloomFilter:
+    """
+    Set membership in `size` bits with `hashes` probes per key: never a false
+    negative, false positives at about `error_rate` while it holds at most
+    `capacity` keys. Probe positions come from one BLAKE2b digest by double
+    hashing.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Add `key`; returns False if it (probably) was there already."""
+        bits = self.bits
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class RevocationList:
+    """
+    Revoked token JTIs, answered from an in-process Bloom filter.
+
+    The filter is built from the unexpired `RevokedToken` rows on first use in
+    each process. A revocation bumps a version key in the shared cache when it
+    commits; a process seeing a new version adds the rows revoked since its
+    last sync (with `sync_overlap` to cover transactions committing out of
+    order and clock skew), and rebuilds the filter larger once it holds more
+    than its capacity. A JTI absent from the filter is not revoked, without a
+    query; a hit, real or false positive, is confirmed against the table.
+    """
+    version_key = 'auth:revocation:version'
+    sync_overlap = timedelta(seconds=60)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._version = None
+        self._synced_at = None
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def _rebuild(self, started, capacity=None):
+        bloom = BloomFilter(
+            capacity or settings.TOKEN_REVOCATION_FILTER_CAPACITY, settings.TOKEN_REVOCATION_FILTER_ERROR_RATE
+        )
+        jtis = RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True)
+        for jti in jtis.iterator(chunk_size=10000):
+            bloom.add(jti)
+        if len(bloom) > bloom.capacity:
+            return self._rebuild(started, 2 * len(bloom))
+        self._filter = bloom
+
+    def sync(self):
+        version = self._current_version()
+        if self._filter is not None and version == self._version:
+            return
+        with self._lock:
+            if self._filter is not None and version == self._version:
+                return
+            started = timezone.now()
+            if self._filter is None or len(self._filter) > self._filter.capacity:
+                self._rebuild(started, self._filter and 2 * len(self._filter))
+            else:
+                jtis = RevokedToken.objects.filter(revoked_at__gte=self._synced_at - self.sync_overlap)
+                for jti in jtis.values_list('jti', flat=True).iterator(chunk_size=10000):
+                    self._filter.add(jti)
+            self._version, self._synced_at = version, started
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token):
+        """Persist the token's JTI and tell every process once it commits."""
+        _, created = RevokedToken.objects.get_or_create(
+            jti=token[api_settings.JTI_CLAIM],
+            defaults={
+                'user_id': token[api_settings.USER_ID_CLAIM],
+                'expires_at': datetime_from_epoch(token['exp']),
+            },
+        )
+        if created:
+            transaction.on_commit(self._bump)
+
+    def _bump(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), None)
+
+
+revoked_tokens = RevocationList()
@@ -1,4 +1,12 @@
+from django.core import signing
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+from apps.base.serializers import SparseFieldsetsMixin
+from apps.auth.authentication import ensure_token_is_active, get_user_state
+from apps.auth.invites import read_invite_token
 from apps.auth.models import User
 
 
@@ -21,7 +29,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(password=password, **validated_data)
         return user
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'full_name', 'role', 'is_active', 'created_at']
@@ -38,3 +46,56 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
         return user
 
+
+def _ensure_not_revoked(token):
+    state = get_user_state(token[api_settings.USER_ID_CLAIM]) or {}
+    ensure_token_is_active(token, state.get('tokens_revoked_at'))
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        _ensure_not_revoked(self.token_class(attrs['refresh']))
+        return super().validate(attrs)
+
+
+class RevocableTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        _ensure_not_revoked(UntypedToken(attrs['token']))
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+    
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(e.args[0])
+        if str(token[api_settings.USER_ID_CLAIM]) != str(self.context['request'].user.id):
+            raise serializers.ValidationError("Token belongs to another user")
+        return token
+
+
+class InviteAcceptSerializer(serializers.Serializer):
+    token = serializers.CharField(write_only=True)
+    password = serializers.CharField(write_only=True, min_length=8)
+    
+    def validate_token(self, value):
+        try:
+            email = read_invite_token(value)
+        except signing.SignatureExpired:
+            raise serializers.ValidationError("Invite has expired")
+        except signing.BadSignature:
+            raise serializers.ValidationError("Invalid invite")
+        user = User.objects.filter(email=email).first()
+        # Once a password is set the invite is used up
+        if user is None or user.has_usable_password():
+            raise serializers.ValidationError("Invalid invite")
+        return user
+    
+    def save(self):
+        user = self.validated_data['token']
+        user.set_password(self.validated_data['password'])
+        user.save(update_fields=['password', 'updated_at'])
+        return user
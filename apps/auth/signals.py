@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.auth.authentication import invalidate_user_state
+from apps.auth.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_state(sender, instance, **kwargs):
+    invalidate_user_state(instance.pk)
@@ -0,0 +1,14 @@
+from celery import shared_task
+from django.utils import timezone
+
+from apps.auth.models import RevokedToken
+
+
+@shared_task
+def purge_revoked_tokens():
+    """
+    Run by Celery beat every `TOKEN_REVOCATION_PURGE_INTERVAL` seconds. A token
+    past its expiry fails validation anyway, so its row is no longer needed.
+    """
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return f"Revoked tokens: {deleted} expired row(s) deleted"
@@ -1,13 +1,32 @@
 """
 Tests for authentication and user management
 """
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from rest_framework.test import APITestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIRequestFactory
 from rest_framework import status
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from apps.auth.models import Role
+from apps.auth.authentication import StatelessJWTAuthentication
+from apps.auth.hashing import password_checks
+from apps.auth.invites import make_invite_token
+from apps.auth.models import Role, RevokedToken
+from apps.auth.revocation import BloomFilter, RevocationList, revoked_tokens
+from apps.auth.tasks import purge_revoked_tokens
+from apps.auth.tokens import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -111,9 +130,18 @@ class AuthenticationTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
     
+    def test_user_list_with_sparse_fieldsets(self):
+        """The user list is a plain generic view and still honours ?fields="""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        
+        response = self.client.get('/api/user/list/?fields=id,email')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.user.id, 'email': 'testuser@test.com'}])
+    
     def test_token_refresh(self):
         """Users should be able to refresh tokens"""
-        refresh_token = RefreshToken.for_user(self.user)
+        refresh_token = ClaimsRefreshToken.for_user(self.user)
         
         response = self.client.post('/api/token/refresh/', {
             'refresh': str(refresh_token)
@@ -122,3 +150,379 @@ class AuthenticationTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
 
+
+
+class StatelessAuthenticationTestCase(APITestCase):
+    """Test building the user from token claims"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            email='testuser@test.com',
+            password='testpass123',
+            full_name='Test User',
+            role=Role.STUDENT
+        )
+        self.factory = APIRequestFactory()
+    
+    def authenticate(self, token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)
+    
+    def test_user_is_built_from_claims(self):
+        """A token from login authenticates without reading the users table"""
+        response = self.client.post('/api/auth/login/', {
+            'email': 'testuser@test.com',
+            'password': 'testpass123'
+        })
+        access = response.data['access']
+        self.authenticate(access)
+        
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(access)
+            self.assertEqual(user, self.user)
+            self.assertEqual(user.full_name, 'Test User')
+            self.assertTrue(user.is_student)
+            self.assertFalse(user.is_staff)
+        
+        # Fields outside the claims are loaded on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.user.date_joined)
+    
+    def test_refreshed_access_token_keeps_claims(self):
+        """Access tokens from a refresh carry the same claims"""
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        response = self.client.post('/api/token/refresh/', {'refresh': str(refresh)})
+        self.authenticate(response.data['access'])
+        
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(response.data['access'])
+        self.assertEqual(user.email, 'testuser@test.com')
+    
+    def test_deactivated_user_is_rejected(self):
+        """Saving the user drops the cached state, so deactivation applies at once"""
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        self.authenticate(token)
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+    
+    def test_token_with_outdated_role_is_rejected(self):
+        """Tokens issued before a role change stop working"""
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        
+        self.user.role = Role.INSTRUCTOR
+        self.user.save()
+        
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+    
+    def test_token_without_claims_loads_the_user(self):
+        """Tokens issued without the claims still authenticate"""
+        token = RefreshToken.for_user(self.user).access_token
+        revoked_tokens.sync()
+        
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(token)
+        self.assertEqual(user.full_name, 'Test User')
+
+
+class TokenRevocationTestCase(APITestCase):
+    """Test logout, forced sign-out and the revocation filter"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            email='testuser@test.com',
+            password='testpass123',
+            full_name='Test User',
+            role=Role.STUDENT
+        )
+        self.refresh = ClaimsRefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+    
+    def test_logout_revokes_refresh_and_access_token(self):
+        """After logout neither token is accepted"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/logout/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        response = self.client.post('/api/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_logout_rejects_refresh_token_of_another_user(self):
+        """Users can only revoke their own tokens"""
+        other = User.objects.create_user(
+            email='other@test.com', password='testpass123', full_name='Other', role=Role.STUDENT
+        )
+        response = self.client.post('/api/auth/logout/', {'refresh': str(ClaimsRefreshToken.for_user(other))})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RevokedToken.objects.exists())
+    
+    def test_revocation_reaches_other_processes(self):
+        """Another process's filter picks up the revocation through the cache version"""
+        other_process = RevocationList()
+        self.assertFalse(other_process.is_revoked(self.refresh['jti']))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            revoked_tokens.revoke(self.refresh)
+        
+        self.assertTrue(other_process.is_revoked(self.refresh['jti']))
+    
+    def test_unrevoked_token_check_needs_no_query(self):
+        """Tokens outside the filter are answered in memory"""
+        revoked_tokens.sync()
+        
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked(self.refresh['jti']))
+    
+    def test_forced_sign_out(self):
+        """Staff can invalidate every token a user holds"""
+        self.refresh.set_iat(at_time=timezone.now() - timedelta(minutes=1))
+        old_access = self.refresh.access_token
+        admin = User.objects.create_user(
+            email='admin@test.com', password='testpass123', full_name='Admin', role=Role.INSTRUCTOR, is_staff=True
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(admin).access_token}')
+        
+        # Signed out a few seconds ago, so a login now is past the cutoff
+        with patch('apps.auth.views.timezone.now', return_value=timezone.now() - timedelta(seconds=5)):
+            response = self.client.post(f'/api/user/{self.user.id}/sign_out/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        response = self.client.post('/api/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/token/verify/', {'token': str(old_access)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        # Logging in again works
+        response = self.client.post('/api/auth/login/', {'email': 'testuser@test.com', 'password': 'testpass123'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/courses/').status_code, status.HTTP_200_OK)
+    
+    def test_forced_sign_out_rejects_tokens_of_the_same_second(self):
+        """A token issued in the second of the sign-out is rejected, whether before or after it"""
+        # In the past, since PyJWT rejects tokens issued in the future
+        signed_out_at = (timezone.now() - timedelta(seconds=10)).replace(microsecond=500000)
+        admin = User.objects.create_user(
+            email='admin@test.com', password='testpass123', full_name='Admin', role=Role.INSTRUCTOR, is_staff=True
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(admin).access_token}')
+        with patch('apps.auth.views.timezone.now', return_value=signed_out_at):
+            self.client.post(f'/api/user/{self.user.id}/sign_out/')
+        
+        self.refresh.set_iat(at_time=signed_out_at)
+        response = self.client.post('/api/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        self.refresh.set_iat(at_time=signed_out_at + timedelta(seconds=1))
+        response = self.client.post('/api/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_expired_revocations_are_purged(self):
+        """The periodic purge deletes rows of tokens past their expiry and keeps the rest"""
+        expired = ClaimsRefreshToken.for_user(self.user)
+        expired.set_exp(from_time=timezone.now() - timedelta(days=30))
+        with self.captureOnCommitCallbacks(execute=True):
+            revoked_tokens.revoke(self.refresh)
+            revoked_tokens.revoke(expired)
+        
+        self.assertEqual(purge_revoked_tokens.delay().get(), "Revoked tokens: 1 expired row(s) deleted")
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), [self.refresh['jti']])
+        self.assertTrue(revoked_tokens.is_revoked(self.refresh['jti']))
+    
+    def test_forced_sign_out_is_staff_only(self):
+        """Users cannot sign others out"""
+        response = self.client.post(f'/api/user/{self.user.id}/sign_out/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BloomFilterTestCase(TestCase):
+    """Test the Bloom filter behind the revocation list"""
+    
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(10000, 0.01)
+        members = [f'member-{i}' for i in range(10000)]
+        for key in members:
+            bloom.add(key)
+        
+        self.assertTrue(all(key in bloom for key in members))
+        false_positives = sum(f'other-{i}' in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'django.contrib.auth.hashers.ScryptPasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher',
+])
+class LoginPasswordCheckTestCase(APITestCase):
+    """Test password checks on the bounded pool"""
+    
+    def setUp(self):
+        """Set up test data with a hash from an older hasher"""
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            self.user = User.objects.create_user(
+                email='testuser@test.com',
+                password='testpass123',
+                full_name='Test User',
+                role=Role.STUDENT
+            )
+        self.addCleanup(password_checks.shutdown)
+    
+    def login(self):
+        return self.client.post('/api/auth/login/', {'email': 'testuser@test.com', 'password': 'testpass123'})
+    
+    def test_login_upgrades_password_hash(self):
+        """A hash from an older hasher is redone with the preferred one"""
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertTrue(self.user.check_password('testpass123'))
+    
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_MAX_QUEUE=0)
+    def test_login_is_throttled_when_pool_is_full(self):
+        """Logins beyond the pool and its queue get a 429 instead of waiting"""
+        password_checks.shutdown()
+        release = threading.Event()
+        
+        def slow_verify(password, encoded):
+            release.wait(5)
+            return False, False
+        
+        rejected = password_checks.stats()['rejected']
+        with patch('apps.auth.hashing.verify_password', side_effect=slow_verify):
+            busy = threading.Thread(target=password_checks.verify, args=('other', None))
+            busy.start()
+            while password_checks.stats()['in_flight'] == 0:
+                time.sleep(0.01)
+            
+            response = self.login()
+            release.set()
+            busy.join()
+        
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(password_checks.stats()['rejected'], rejected + 1)
+        # The pool is free again
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+    
+    @override_settings(LOGIN_HASH_WORKERS=0)
+    def test_inline_password_check(self):
+        """With no pool threads the check runs in the request thread"""
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+    
+    def test_login_stats_are_staff_only(self):
+        """Pool counters are visible to staff"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}')
+        self.assertEqual(self.client.get('/api/auth/login_stats/').status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/auth/login_stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('wait_ms_p95', response.data)
+
+
+class ImportUsersTestCase(APITestCase):
+    """Test the import_users command and invite acceptance"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.existing = User.objects.create_user(
+            email='existing@test.com',
+            password='testpass123',
+            full_name='Existing User',
+            role=Role.INSTRUCTOR
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+    
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+    
+    def import_users(self, path, *args):
+        call_command('import_users', path, '--workers', '0', '--chunk-size', '2', *args, verbosity=0,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+    
+    def test_import_csv(self):
+        """Rows are normalized, existing and invalid ones skipped, rows without a password invited"""
+        path = self.write('users.csv', (
+            'email,full_name,role,password\n'
+            ' New.Student@TEST.com ,New Student,,studentpass1\n'
+            'existing@TEST.COM,Someone Else,student,otherpass1\n'
+            'not-an-email,Broken,student,x\n'
+            'teacher@test.com,Teacher,INSTRUCTOR,\n'
+            'bad-role@test.com,Bad,janitor,x\n'
+            'New.Student@test.com,Duplicate,student,duplicate1\n'
+        ))
+        invites = os.path.join(self.directory.name, 'invites.csv')
+        self.import_users(path, '--invites-out', invites)
+        
+        self.assertEqual(User.objects.count(), 3)
+        student = User.objects.get(email='New.Student@test.com')
+        self.assertEqual((student.full_name, student.role), ('New Student', Role.STUDENT))
+        self.assertTrue(student.check_password('studentpass1'))
+        teacher = User.objects.get(email='teacher@test.com')
+        self.assertEqual(teacher.role, Role.INSTRUCTOR)
+        self.assertFalse(teacher.has_usable_password())
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.full_name, 'Existing User')
+        with open(invites) as f:
+            self.assertEqual([row[0] for row in csv.reader(f)], ['teacher@test.com'])
+    
+    def test_import_ndjson_in_process_pool(self):
+        """NDJSON rows are imported with passwords hashed in worker processes"""
+        rows = [{'email': f'student{i}@test.com', 'full_name': f'Student {i}', 'password': f'pass-{i}-word'}
+                for i in range(5)]
+        path = self.write('users.ndjson', '\n'.join(json.dumps(row) for row in rows) + '\n[1, 2]\n')
+        self.import_users(path, '--workers', '2')
+        
+        for row in rows:
+            self.assertTrue(User.objects.get(email=row['email']).check_password(row['password']))
+    
+    def test_import_ndjson_rejects_values_that_are_not_text(self):
+        """Rows with a non-string value are counted invalid and the import goes on"""
+        rows = [
+            {'email': None, 'full_name': 'No Email'},
+            {'email': 'numeric-role@test.com', 'role': 1},
+            {'email': 'numeric-name@test.com', 'full_name': 42},
+            {'email': 'null-role@test.com', 'role': None, 'full_name': 'Null Role'},
+        ]
+        path = self.write('users.ndjson', '\n'.join(json.dumps(row) for row in rows) + '\n')
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_users', path, '--workers', '0', stdout=stdout, stderr=stderr)
+        
+        self.assertIn('skipped 0 existing and 3 invalid', stdout.getvalue())
+        self.assertIn("Line 2: role must be a string, not 1", stderr.getvalue())
+        self.assertEqual(User.objects.get(email='null-role@test.com').role, Role.STUDENT)
+        self.assertEqual(User.objects.count(), 2)
+    
+    def test_accept_invite(self):
+        """An invite sets the password once and expires"""
+        path = self.write('users.csv', 'email,full_name\ninvited@test.com,Invited User\n')
+        self.import_users(path, '--invite')
+        token = make_invite_token('invited@test.com')
+        
+        with override_settings(INVITE_TOKEN_MAX_AGE=-1):
+            response = self.client.post('/api/user/invite/accept/', {'token': token, 'password': 'chosenpass1'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post('/api/user/invite/accept/', {'token': token, 'password': 'chosenpass1'})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(User.objects.get(email='invited@test.com').check_password('chosenpass1'))
+        
+        response = self.client.post('/api/user/invite/accept/', {'token': token, 'password': 'otherpass1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Invites only work for accounts without a password
+        response = self.client.post('/api/user/invite/accept/', {
+            'token': make_invite_token('existing@test.com'), 'password': 'otherpass1',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
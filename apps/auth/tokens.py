@@ -0,0 +1,19 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# User fields copied into every token, enough to rebuild the user without a query
+USER_CLAIMS = ('email', 'full_name', 'role')
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying `USER_CLAIMS`. Access tokens created from it (at
+    login or on refresh) copy the claims, which is what lets
+    `StatelessJWTAuthentication` skip the users table.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
@@ -5,15 +5,23 @@ from rest_framework_simplejwt.views import (
 )
 from apps.auth.views import (
     CustomTokenObtainPairView,
+    InviteAcceptView,
+    LoginStatsView,
+    LogoutView,
     UserRegistrationView,
     UserListView,
+    UserSignOutView,
 )
 
 urlpatterns = [
     path('api/auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/auth/logout/', LogoutView.as_view(), name='logout'),
+    path('api/auth/login_stats/', LoginStatsView.as_view(), name='login_stats'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('api/user/register/', UserRegistrationView.as_view(), name='user_register'),
     path('api/user/list/', UserListView.as_view(), name='user_list'),
+    path('api/user/invite/accept/', InviteAcceptView.as_view(), name='user_invite_accept'),
+    path('api/user/<int:pk>/sign_out/', UserSignOutView.as_view(), name='user_sign_out'),
 
 ]
@@ -1,21 +1,29 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework import generics, status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
+from apps.auth.hashing import password_checks
 from apps.auth.models import User
-from apps.auth.serializers import UserRegistrationSerializer, UserSerializer
+from apps.auth.revocation import revoked_tokens
+from apps.auth.tokens import ClaimsRefreshToken
+from apps.auth.serializers import (
+    InviteAcceptSerializer, LogoutSerializer, UserRegistrationSerializer, UserSerializer,
+)
+from apps.base.mixins import SparseQuerysetMixin
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
-    @classmethod
-    def get_token(cls, user):
-        token = super().get_token(user)
-        token['role'] = user.role
-        token['email'] = user.email
-        return token
+    # Embeds role, email and full_name in the tokens
+    token_class = ClaimsRefreshToken
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -44,8 +52,58 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
 
-class UserListView(generics.ListAPIView):
+class UserListView(SparseQuerysetMixin, generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    cursor_ordering = ('-created_at', '-id')
+
+
+class LogoutView(generics.GenericAPIView):
+    """Revoke the given refresh token and the access token of the request."""
+    serializer_class = LogoutSerializer
+    
+    @extend_schema(responses={204: None})
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            revoked_tokens.revoke(serializer.validated_data['refresh'])
+            revoked_tokens.revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class InviteAcceptView(generics.GenericAPIView):
+    """Set the password of a user imported with an invite, which activates the invite's account."""
+    serializer_class = InviteAcceptSerializer
+    permission_classes = [AllowAny]
+    
+    @extend_schema(responses={204: None})
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
+class UserSignOutView(generics.GenericAPIView):
+    """Sign a user out everywhere: every token issued so far stops working."""
+    queryset = User.objects.all()
+    permission_classes = [IsAdminUser]
+    
+    @extend_schema(request=None, responses={204: None})
+    def post(self, request, *args, **kwargs):
+        user = self.get_object()
+        # Token iat claims are whole seconds, so the cutoff is rounded up: tokens
+        # issued in the same second, before or after this, are rejected too
+        user.tokens_revoked_at = timezone.now().replace(microsecond=0) + timedelta(seconds=1)
+        user.save(update_fields=['tokens_revoked_at', 'updated_at'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
+
+class LoginStatsView(APIView):
+    """Password check pool of this process: threads busy, logins queued or throttled, queue wait times."""
+    permission_classes = [IsAdminUser]
+    
+    @extend_schema(responses=OpenApiResponse(description='Password check pool counters'))
+    def get(self, request, *args, **kwargs):
+        return Response(password_checks.stats())
@@ -0,0 +1,166 @@
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Q
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import NotFound
+
+
+class ConditionalGetMixin:
+    """
+    Adds an ETag validator to `list` and `retrieve`, and Last-Modified to
+    `retrieve`.
+
+    Validators are derived from `MAX(updated_at)` and row counts of the querysets
+    returned by `get_validator_querysets()`, so no serialization is needed to
+    answer `If-None-Match` / `If-Modified-Since` with a 304. The ETag also covers
+    the query string (filters and page) and the requesting user. Lists send no
+    Last-Modified: deleting any row but the newest changes their count, not
+    their `MAX(updated_at)`.
+    """
+
+    def get_validator_querysets(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            queryset = self.filter_to_lookup(queryset)
+        return [queryset]
+
+    def filter_to_lookup(self, queryset, field=None):
+        """
+        `queryset` narrowed to the object named in the URL, on `field` (the
+        view's `lookup_field` by default). Validators are built before
+        `get_object()`, so a malformed value is answered with its 404 here.
+        """
+        value = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            return queryset.filter(**{field or self.lookup_field: value})
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(getattr(self, 'not_found_message', None))
+
+    def get_validator_scope(self):
+        user = self.request.user
+        return [self.action, user.pk, getattr(user, 'role', None)]
+
+    def get_validators(self):
+        parts = self.get_validator_scope()
+        parts.append(sorted(
+            (key, value) for key in self.request.query_params for value in self.request.query_params.getlist(key)
+        ))
+        last_modified = None
+        for queryset in self.get_validator_querysets():
+            aggregates = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+            if aggregates['last_modified'] is not None:
+                timestamp = aggregates['last_modified'].timestamp()
+                last_modified = timestamp if last_modified is None else max(last_modified, timestamp)
+                parts.append([timestamp, aggregates['count']])
+            else:
+                parts.append([None, aggregates['count']])
+        etag = hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+        if self.action != 'retrieve':
+            last_modified = None
+        return {
+            'etag': quote_etag(etag),
+            'last_modified': int(last_modified) if last_modified is not None else None,
+        }
+
+    def conditional_response(self, request, respond):
+        validators = self.get_validators()
+        response = get_conditional_response(
+            request, etag=validators['etag'], last_modified=validators['last_modified']
+        )
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response['ETag'] = validators['etag']
+            if validators['last_modified'] is not None:
+                response['Last-Modified'] = http_date(validators['last_modified'])
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+
+class SparseQuerysetMixin:
+    """
+    Pushes `?fields=` / `?omit=` down to the queryset: model fields that none of
+    the remaining serializer fields read are deferred, so large columns are
+    neither read nor transferred. Relations and queryset annotations are always
+    kept.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.uses_sparse_fieldsets():
+            return queryset
+        return self.apply_sparse_fieldsets(queryset)
+
+    def uses_sparse_fieldsets(self):
+        # Generic views other than viewsets have no `action`; their reads are sparse
+        if hasattr(self, 'action'):
+            return self.action in self.sparse_actions
+        return self.request.method in ('GET', 'HEAD')
+
+    def apply_sparse_fieldsets(self, queryset):
+        if 'fields' not in self.request.query_params and 'omit' not in self.request.query_params:
+            return queryset
+        serializer = self.get_serializer()
+        if hasattr(serializer, 'child'):
+            serializer = serializer.child
+        if not hasattr(serializer, 'get_model_field_dependencies'):
+            return queryset
+
+        annotations = set(queryset.query.annotations)
+        for name in list(serializer.fields):
+            if serializer.fields[name].source in annotations:
+                serializer.fields.pop(name)
+        required = serializer.get_model_field_dependencies()
+        if required is None:
+            return queryset
+        # Ordering columns are read back by the paginator to build cursors
+        ordering = getattr(self, 'cursor_ordering', None) or queryset.model._meta.ordering or ()
+        required |= {field.lstrip('-') for field in ordering}
+
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if field.name not in required and not field.primary_key and not field.is_relation
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class OwnedObjectMixin:
+    """
+    Looks up the object of an `owner_actions` action together with whether the
+    user owns it, in one query. `owner_field` is the path from the model to
+    its owner's id column (`instructor_id`, `course__instructor_id`), so the
+    owner is compared by id without loading any user. The object is looked up
+    in `get_owner_lookup_queryset()`, the rows the user may learn exist: a
+    missing one is a 404 with `not_found_message`, and object permissions read
+    the `is_owned` annotation to deny the others with their own 403 message.
+    """
+    owner_field = None
+    owner_actions = ('update', 'partial_update', 'destroy')
+    not_found_message = None
+
+    def get_owner_lookup_queryset(self):
+        return self.get_queryset()
+
+    def get_object(self):
+        if self.action not in self.owner_actions:
+            return super().get_object()
+        queryset = self.get_owner_lookup_queryset().annotate(is_owned=ExpressionWrapper(
+            Q(**{self.owner_field: self.request.user.id}), output_field=BooleanField()
+        ))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = queryset.get(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise NotFound(self.not_found_message)
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,55 @@
+def parse_fieldsets(request):
+    """
+    Return the `(fields, omit)` sets requested through `?fields=a,b` and
+    `?omit=c`. `fields` is None when the client did not restrict the fields.
+    """
+    if request is None or not hasattr(request, 'query_params'):
+        return None, set()
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit', '')
+    fields = {name.strip() for name in fields.split(',') if name.strip()} if fields else None
+    omit = {name.strip() for name in omit.split(',') if name.strip()}
+    return fields, omit
+
+
+class SparseFieldsetsMixin:
+    """
+    Drops serializer fields that were not requested via `?fields=` or were
+    excluded via `?omit=`. Only serializers created by a view (that receive the
+    request in their context) are trimmed; nested serializers keep all fields.
+
+    `Meta.field_dependencies` maps fields that are not backed by a single model
+    field (properties, computed values) to the model fields they read, so views
+    can safely defer everything else.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, omit = parse_fieldsets(self._context.get('request'))
+        if fields is None and not omit:
+            return
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or name in omit:
+                self.fields.pop(name)
+
+    def get_model_field_dependencies(self):
+        """
+        Names of the model fields read by the remaining serializer fields, or
+        None if some field reads something we cannot account for.
+        """
+        model = self.Meta.model
+        dependencies = getattr(self.Meta, 'field_dependencies', {})
+        concrete = {field.name: field for field in model._meta.concrete_fields}
+        required = set()
+        for name, field in self.fields.items():
+            if name in dependencies:
+                required.update(dependencies[name])
+                continue
+            source = field.source.split('.')[0] if field.source != '*' else None
+            if source in concrete:
+                required.add(source)
+            elif source == 'pk':
+                required.add(model._meta.pk.name)
+            else:
+                return None
+        return required
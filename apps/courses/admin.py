@@ -1,9 +1,33 @@
+from django import forms
 from django.contrib import admin
 from apps.courses.models.course import Course
 from apps.courses.models.lesson import Lesson, LessonProgress
 from apps.courses.models.enrollment import Enrollment
 
+
+class LessonAdminForm(forms.ModelForm):
+    content = forms.CharField(widget=forms.Textarea)
+
+    class Meta:
+        model = Lesson
+        fields = ['course', 'title', 'content', 'order']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['content'].initial = self.instance.content
+
+    def save(self, commit=True):
+        if 'content' in self.changed_data or not self.instance.pk:
+            self.instance.content = self.cleaned_data['content']
+        return super().save(commit)
+
+
+@admin.register(Lesson)
+class LessonAdmin(admin.ModelAdmin):
+    form = LessonAdminForm
+
+
 admin.site.register(Course)
-admin.site.register(Lesson)
 admin.site.register(LessonProgress)
 admin.site.register(Enrollment)
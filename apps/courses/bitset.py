@@ -0,0 +1,54 @@
+# Lesson orders are capped so no enrollment's bitset outgrows a few kilobytes
+MAX_LESSON_ORDER = 10000
+
+
+class CompletionBitset:
+    """
+    Completion flags of one enrollment, one bit per lesson position: bit k-1
+    is set once the lesson with `order` k is completed. Stored little-endian,
+    so a course with N lessons needs at most ceil(N / 8) bytes.
+    """
+
+    def __init__(self, data=b''):
+        self.value = int.from_bytes(bytes(data or b''), 'little')
+
+    def to_bytes(self):
+        return self.value.to_bytes((self.value.bit_length() + 7) // 8, 'little')
+
+    def is_done(self, order):
+        return order >= 1 and bool(self.value >> (order - 1) & 1)
+
+    def set(self, order, done=True):
+        """Mark lesson `order` done (or not done). Returns True if the bit changed."""
+        if order < 1 or self.is_done(order) == done:
+            return False
+        self.value ^= 1 << (order - 1)
+        return True
+
+    def popcount(self):
+        return self.value.bit_count()
+
+    def completed_orders(self):
+        value, order, orders = self.value, 1, []
+        while value:
+            if value & 1:
+                orders.append(order)
+            value >>= 1
+            order += 1
+        return orders
+
+    def first_incomplete(self, orders):
+        """The first of `orders` (the course's lesson orders, ascending) not yet done."""
+        for order in orders:
+            if not self.is_done(order):
+                return order
+        return None
+
+    def move(self, old_order, new_order):
+        """Carry the flag of a lesson whose order changed; `new_order=None` drops it."""
+        done = self.is_done(old_order)
+        changed = self.set(old_order, False)
+        if done and new_order is not None:
+            self.set(new_order, True)
+            changed = old_order != new_order
+        return changed
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+
+class CatalogCache:
+    """
+    Versioned cache for the student view of the published course catalog.
+
+    Keys embed a global catalog version (list pages) or a per-course version
+    (detail), so invalidation is a single counter bump and stale entries simply
+    age out. Versions are seeded from the clock, which keeps keys unique even if
+    a version counter is evicted. A short-lived lock key ensures that only one
+    request rebuilds a missing entry while the others wait for it.
+    """
+    prefix = 'catalog'
+    lock_timeout = 10
+    lock_poll_interval = 0.05
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'COURSE_CATALOG_CACHE_TIMEOUT', 300)
+
+    def _version(self, key):
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, time.time_ns(), None)
+            version = self.cache.get(key, 0)
+        return version
+
+    def _bump(self, key):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, time.time_ns(), None)
+
+    def global_version(self):
+        return self._version(f"{self.prefix}:version")
+
+    def course_version(self, course_id):
+        return self._version(f"{self.prefix}:course:{course_id}:version")
+
+    def bump(self, course_id=None):
+        self._bump(f"{self.prefix}:version")
+        if course_id is not None:
+            self._bump(f"{self.prefix}:course:{course_id}:version")
+
+    def bump_on_commit(self, course_id=None):
+        """
+        Bump now so the current entries stop being served, and again once the
+        transaction commits so nothing cached from pre-commit data survives.
+        """
+        self.bump(course_id)
+        transaction.on_commit(lambda: self.bump(course_id))
+
+    @staticmethod
+    def _params_digest(query_params):
+        items = sorted((key, value) for key in query_params for value in query_params.getlist(key))
+        return hashlib.md5(json.dumps(items).encode()).hexdigest()
+
+    def list_key(self, query_params):
+        return f"{self.prefix}:list:{self.global_version()}:{self._params_digest(query_params)}"
+
+    def detail_key(self, course_id, query_params):
+        return f"{self.prefix}:detail:{course_id}:{self.course_version(course_id)}:{self._params_digest(query_params)}"
+
+    def get_or_build(self, key, builder, track_stats=True):
+        """
+        Return `(data, hit)` for `key`, calling `builder` on a miss. `builder`
+        returns response data, or None for responses that must not be cached.
+        """
+        data = self.cache.get(key)
+        if data is not None:
+            if track_stats:
+                self._count('hits')
+            return data, True
+
+        if track_stats:
+            self._count('misses')
+        lock_key = f"{key}:lock"
+        if not self.cache.add(lock_key, 1, self.lock_timeout):
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.lock_poll_interval)
+                data = self.cache.get(key)
+                if data is not None:
+                    return data, True
+                if self.cache.add(lock_key, 1, self.lock_timeout):
+                    break
+            else:
+                return builder(), False
+
+        try:
+            data = builder()
+            if data is not None:
+                # Store plain JSON types so entries never pin serializers or requests
+                data = json.loads(JSONRenderer().render(data))
+                self.cache.set(key, data, self.timeout)
+            return data, False
+        finally:
+            self.cache.delete(lock_key)
+
+    def _count(self, name):
+        key = f"{self.prefix}:stats:{name}"
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, None):
+                self.cache.incr(key)
+
+    def stats(self):
+        hits = self.cache.get(f"{self.prefix}:stats:hits", 0)
+        misses = self.cache.get(f"{self.prefix}:stats:misses", 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+        }
+
+
+catalog_cache = CatalogCache()
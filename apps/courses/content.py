@@ -0,0 +1,92 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.db import connections
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+ENCODING_CHOICES = [
+    (IDENTITY, 'Uncompressed'),
+    (GZIP, 'gzip'),
+    (ZSTD, 'Zstandard'),
+]
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def preferred_codec():
+    codec = getattr(settings, 'LESSON_CONTENT_CODEC', ZSTD)
+    if codec == ZSTD and zstandard is None:
+        return GZIP
+    return codec
+
+
+def encode_content(text):
+    """
+    Return `(encoding, data, size)` for a lesson body. Bodies below
+    `LESSON_CONTENT_COMPRESSION_THRESHOLD` bytes, or that do not shrink, are
+    stored as plain UTF-8.
+    """
+    raw = (text or '').encode('utf-8')
+    threshold = getattr(settings, 'LESSON_CONTENT_COMPRESSION_THRESHOLD', 1024)
+    codec = preferred_codec()
+    if codec == IDENTITY or len(raw) < threshold:
+        return IDENTITY, raw, len(raw)
+
+    if codec == ZSTD:
+        data = zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        data = gzip.compress(raw, compresslevel=6, mtime=0)
+    if len(data) >= len(raw):
+        return IDENTITY, raw, len(raw)
+    return codec, data, len(raw)
+
+
+def _decompressor(encoding):
+    if encoding == GZIP:
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS).decompress
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('Lesson content is zstd-compressed but the zstandard package is not installed.')
+        return zstandard.ZstdDecompressor().decompressobj().decompress
+    return None
+
+
+def iter_content(encoding, data, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the UTF-8 body in chunks without materialising it when compressed."""
+    data = memoryview(data)
+    decompress = _decompressor(encoding)
+    for start in range(0, len(data), chunk_size):
+        chunk = bytes(data[start:start + chunk_size])
+        chunk = decompress(chunk) if decompress else chunk
+        if chunk:
+            yield chunk
+
+
+def decode_content(encoding, data):
+    return b''.join(iter_content(encoding, data)).decode('utf-8')
+
+
+def update_content_vectors(rows, using):
+    """
+    Refresh the SQL-only `lessons.content_vector` column from `(lesson_id, text)`
+    pairs. The body is compressed at rest, so PostgreSQL cannot index it itself;
+    the search trigger folds this vector into `search_vector`.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql' or not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            "UPDATE lessons SET content_vector = to_tsvector(%s::regconfig, %s) WHERE id = %s",
+            [(settings.SEARCH_CONFIG, text, lesson_id) for lesson_id, text in rows],
+        )
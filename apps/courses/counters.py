@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.courses.bitset import CompletionBitset
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import Enrollment
+from apps.courses.models.lesson import Lesson, LessonProgress
+
+
+def _count(queryset, group_by):
+    return Coalesce(
+        Subquery(queryset.order_by().values(group_by).annotate(total=Count('pk')).values('total')),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def actual_lesson_count():
+    return _count(Lesson.objects.filter(course=OuterRef('pk')), 'course')
+
+
+COUNTERS = [
+    (Course, 'lesson_count', actual_lesson_count),
+]
+
+
+def _pk_ranges(model, batch_size):
+    last_pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    for start in range(0, last_pk, batch_size):
+        yield start, start + batch_size
+
+
+def _repair_completion(batch_size, dry_run):
+    """
+    Rebuild each enrollment's completion bitset from its progress rows (only
+    when `LESSON_PROGRESS_STORE` is "rows", otherwise the bitset is the
+    source), then `completed_lessons` from its popcount and `frontier_order`
+    from the course's lesson orders.
+    """
+    from_rows = settings.LESSON_PROGRESS_STORE == 'rows'
+    fixed = 0
+    for start, end in _pk_ranges(Enrollment, batch_size):
+        enrollments = list(Enrollment.objects.filter(pk__gt=start, pk__lte=end).only(
+            'course_id', 'completion_bits', 'completion_times', 'completed_lessons', 'frontier_order'
+        ))
+        orders = {}
+        for course_id, order in Lesson.objects.filter(
+            course_id__in={enrollment.course_id for enrollment in enrollments}
+        ).order_by('order').values_list('course_id', 'order'):
+            orders.setdefault(course_id, []).append(order)
+        if from_rows:
+            rows = {}
+            completed = LessonProgress.objects.filter(
+                enrollment_id__gt=start, enrollment_id__lte=end, completed=True
+            ).values_list('enrollment_id', 'lesson__order', 'completed_at')
+            for enrollment_id, order, completed_at in completed:
+                rows.setdefault(enrollment_id, []).append((order, completed_at))
+        drifted = []
+        for enrollment in enrollments:
+            bits = enrollment.completion
+            times = enrollment.completion_times
+            if from_rows:
+                bits, times = CompletionBitset(), {}
+                for order, completed_at in rows.get(enrollment.pk, []):
+                    bits.set(order)
+                    if completed_at:
+                        times[str(order)] = int(completed_at.timestamp())
+            expected = (bits.to_bytes(), bits.popcount(), bits.first_incomplete(orders.get(enrollment.course_id, [])))
+            if expected != (bytes(enrollment.completion_bits), enrollment.completed_lessons, enrollment.frontier_order):
+                enrollment.completion_bits, enrollment.completed_lessons, enrollment.frontier_order = expected
+                enrollment.completion_times = times
+                drifted.append(enrollment)
+        fixed += len(drifted)
+        if drifted and not dry_run:
+            Enrollment.objects.bulk_update(
+                drifted, ['completion_bits', 'completion_times', 'completed_lessons', 'frontier_order']
+            )
+    return fixed
+
+
+def repair_counters(batch_size=10000, dry_run=False):
+    """
+    Recompute the denormalized progress counters from the underlying rows, one
+    primary key range at a time, and rewrite only the rows that drifted.
+    Returns `{label: rows_fixed}` (rows that would be fixed with `dry_run`).
+    """
+    fixed = {}
+    for model, field, actual in COUNTERS:
+        label = f"{model._meta.label}.{field}"
+        fixed[label] = 0
+        for start, end in _pk_ranges(model, batch_size):
+            drifted = model.objects.filter(pk__gt=start, pk__lte=end).annotate(
+                actual=actual()
+            ).exclude(**{field: F('actual')})
+            if dry_run:
+                fixed[label] += drifted.count()
+            else:
+                fixed[label] += model.objects.filter(pk__in=list(drifted.values_list('pk', flat=True))).update(
+                    **{field: actual()}
+                )
+    fixed[f"{Enrollment._meta.label}.completed_lessons"] = _repair_completion(batch_size, dry_run)
+    return fixed
@@ -0,0 +1,70 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.auth.models import User, Role
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import BulkEnrollmentJob, Enrollment
+from apps.courses.tasks import process_bulk_enrollment
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Seed students and time a bulk enrollment job run in-process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50_000)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of rolling it back.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Seeded data rolled back.')
+
+    def _run(self, options):
+        started = time.perf_counter()
+        instructor, _ = User.objects.get_or_create(
+            email='bench-bulk@example.com',
+            defaults={'full_name': 'Benchmark Instructor', 'role': Role.INSTRUCTOR},
+        )
+        course = Course.objects.create(
+            title='Bulk enrollment benchmark', short_description='Synthetic', instructor=instructor, status='published'
+        )
+        # Hashing is not what is measured here, so every student shares one unusable password
+        password = make_password(None)
+        students = User.objects.bulk_create([
+            User(
+                email=f'bench-bulk-{course.id}-{i}@example.com',
+                full_name=f'Student {i}',
+                role=Role.STUDENT,
+                password=password,
+            )
+            for i in range(options['students'])
+        ], batch_size=5000)
+        self.stdout.write(f"Seeded {len(students)} students in {time.perf_counter() - started:.1f}s")
+
+        job = BulkEnrollmentJob.objects.create(
+            course=course,
+            requested_by=instructor,
+            students=[student.email for student in students],
+            total=len(students),
+        )
+        started = time.perf_counter()
+        process_bulk_enrollment.apply(args=[job.id])
+        elapsed = time.perf_counter() - started
+
+        job.refresh_from_db()
+        self.stdout.write(
+            f"Job {job.status}: {job.enrolled} enrolled, {job.invalid} invalid in {elapsed:.2f}s "
+            f"({job.enrolled / elapsed:,.0f} enrollments/s)"
+        )
+        self.stdout.write(f"Enrollments in course: {Enrollment.objects.filter(course=course).count()}")
@@ -0,0 +1,95 @@
+import random
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.auth.models import User, Role
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import Enrollment
+from apps.courses.models.lesson import Lesson, LessonContent
+from apps.courses.views import CourseViewSet, LessonViewSet, LessonProgressViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure peak Python memory per request for endpoints that load lessons, with and without bodies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=50)
+        parser.add_argument('--body-kb', type=int, default=200)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of rolling it back.')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        try:
+            with transaction.atomic():
+                student, course = self._seed(options)
+                self._measure(student, course, options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Seeded data rolled back.')
+
+    def _seed(self, options):
+        instructor, _ = User.objects.get_or_create(
+            email='bench-memory@example.com',
+            defaults={'full_name': 'Benchmark Instructor', 'role': Role.INSTRUCTOR},
+        )
+        student, _ = User.objects.get_or_create(
+            email='bench-memory-student@example.com',
+            defaults={'full_name': 'Benchmark Student', 'role': Role.STUDENT},
+        )
+        course = Course.objects.create(
+            title='Memory benchmark', short_description='Synthetic', instructor=instructor, status='published'
+        )
+        words = ['lesson', 'body', 'example', 'function', 'variable', 'loop', 'class', 'module']
+        body_words = options['body_kb'] * 1024 // 8
+        Lesson.objects.bulk_create([
+            Lesson(
+                course=course,
+                title=f"Lesson {order}",
+                content=' '.join(random.choice(words) for _ in range(body_words)),
+                order=order,
+            )
+            for order in range(1, options['lessons'] + 1)
+        ])
+        Enrollment.objects.create(student=student, course=course)
+
+        stored = LessonContent.objects.filter(lesson__course=course)
+        raw = sum(row.size for row in stored)
+        compressed = sum(len(row.data) for row in stored)
+        self.stdout.write(
+            f"Seeded {options['lessons']} lessons of ~{options['body_kb']} KB "
+            f"({raw / 1024:.0f} KB raw, {compressed / 1024:.0f} KB stored)"
+        )
+        return student, course
+
+    def _measure(self, student, course, options):
+        factory = APIRequestFactory()
+        first_lesson = course.lessons.first()
+        requests = [
+            # The first rows read every body before lesson content moved to its own table
+            ('lessons list (with bodies)', LessonViewSet.as_view({'get': 'list'}), f'/api/lessons/?course={course.id}&page_size=100', {}),
+            ('lessons list ?omit=content', LessonViewSet.as_view({'get': 'list'}), f'/api/lessons/?course={course.id}&omit=content', {}),
+            ('course detail', CourseViewSet.as_view({'get': 'retrieve'}), f'/api/courses/{course.id}/', {'pk': course.id}),
+            ('progress list', LessonProgressViewSet.as_view({'get': 'list'}), '/api/progress/', {}),
+            ('lesson content stream', LessonViewSet.as_view({'get': 'content'}), f'/api/lessons/{first_lesson.id}/content/', {'pk': first_lesson.id}),
+        ]
+        for label, view, url, kwargs in requests:
+            request = factory.get(url)
+            force_authenticate(request, user=student)
+            tracemalloc.start()
+            response = view(request, **kwargs)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            else:
+                response.render()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(f"{label:<30} status {response.status_code}   peak {peak / 1024:10.1f} KB")
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.auth.models import User, Role
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import Enrollment
+from apps.courses.smtp_stub import LocalSMTPServer
+from apps.courses.tasks import send_course_completion_notifications
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Send completion notifications to a local SMTP stand-in, one connection per message (the former '
+        'send_mail per task) against the batched task over one connection, and report messages per second.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of rolling it back.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Seeded data rolled back.')
+
+    def _run(self, options):
+        instructor, _ = User.objects.get_or_create(
+            email='bench-notifications@example.com',
+            defaults={'full_name': 'Benchmark Instructor', 'role': Role.INSTRUCTOR},
+        )
+        course = Course.objects.create(
+            title='Notification benchmark', short_description='Synthetic', instructor=instructor, status='published'
+        )
+        password = make_password(None)
+        students = User.objects.bulk_create([
+            User(
+                email=f'bench-notifications-{course.id}-{i}@example.com',
+                full_name=f'Student {i}',
+                role=Role.STUDENT,
+                password=password,
+            )
+            for i in range(options['messages'])
+        ], batch_size=5000)
+        enrollments = Enrollment.objects.bulk_create(
+            [Enrollment(student=student, course=course) for student in students], batch_size=5000
+        )
+
+        with LocalSMTPServer() as server, override_settings(**server.settings()):
+            started = time.perf_counter()
+            for student in students:
+                send_mail(
+                    subject=f'Congratulations! You completed {course.title}',
+                    message=f'Dear {student.full_name}, ...',
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[student.email],
+                )
+            self._report('send_mail per message', server, started)
+
+        with LocalSMTPServer() as server, override_settings(**server.settings()):
+            started = time.perf_counter()
+            send_course_completion_notifications.apply(args=[[enrollment.id for enrollment in enrollments]])
+            self._report('batched, one connection', server, started)
+
+    def _report(self, label, server, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<24} {len(server.messages)} messages over {server.connections} connection(s) "
+            f"in {elapsed:.2f}s ({len(server.messages) / elapsed:,.0f} messages/s)"
+        )
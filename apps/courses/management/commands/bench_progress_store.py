@@ -0,0 +1,188 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.auth.models import User, Role
+from apps.courses.bitset import CompletionBitset
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import Enrollment
+from apps.courses.models.lesson import Lesson, LessonProgress
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare storage size and lookup time of row-per-lesson progress against the completion bitset on '
+        'Enrollment. A sample of enrollments is seeded and sizes are extrapolated to --enrollments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=1_000_000, help='Scale to report storage for.')
+        parser.add_argument('--sample', type=int, default=10_000, help='Enrollments actually seeded.')
+        parser.add_argument('--lessons', type=int, default=40)
+        parser.add_argument('--lookups', type=int, default=2000)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of rolling it back.')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Seeded data rolled back.')
+
+    def _run(self, options):
+        rows_before = self._relation_size('lesson_progress')
+        enrollments, lessons = self._seed(options)
+        self._report_storage(options, enrollments, rows_before)
+        self._report_lookups(options, enrollments, lessons)
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        instructor, _ = User.objects.get_or_create(
+            email='bench-progress@example.com',
+            defaults={'full_name': 'Benchmark Instructor', 'role': Role.INSTRUCTOR},
+        )
+        course = Course.objects.create(
+            title='Progress store benchmark', short_description='Synthetic', instructor=instructor, status='published'
+        )
+        lessons = Lesson.objects.bulk_create([
+            Lesson(course=course, title=f"Lesson {order}", order=order)
+            for order in range(1, options['lessons'] + 1)
+        ])
+        password = make_password(None)
+        students = User.objects.bulk_create([
+            User(
+                email=f'bench-progress-{course.id}-{i}@example.com',
+                full_name=f'Student {i}',
+                role=Role.STUDENT,
+                password=password,
+            )
+            for i in range(options['sample'])
+        ], batch_size=5000)
+        enrollments = Enrollment.objects.bulk_create(
+            [Enrollment(student=student, course=course) for student in students], batch_size=5000
+        )
+
+        # Each student has completed a random prefix of the course. The row model
+        # is the dense one: a LessonProgress row per lesson and enrollment.
+        progress = []
+        for enrollment in enrollments:
+            done = random.randint(0, len(lessons))
+            bits, times = CompletionBitset(), {}
+            for lesson in lessons[:done]:
+                bits.set(lesson.order)
+                times[str(lesson.order)] = 1767225600 + lesson.order * 3600
+            enrollment.completion_bits = bits.to_bytes()
+            enrollment.completion_times = times
+            enrollment.completed_lessons = done
+            progress.extend(
+                LessonProgress(enrollment=enrollment, lesson=lesson, completed=lesson.order <= done)
+                for lesson in lessons
+            )
+            if len(progress) >= 10_000:
+                LessonProgress.objects.bulk_create(progress)
+                progress = []
+        LessonProgress.objects.bulk_create(progress)
+        Enrollment.objects.bulk_update(
+            enrollments, ['completion_bits', 'completion_times', 'completed_lessons'], batch_size=5000
+        )
+        self.stdout.write(
+            f"Seeded {len(enrollments)} enrollments x {len(lessons)} lessons "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return enrollments, lessons
+
+    def _relation_size(self, table):
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cursor.fetchone()[0]
+
+    def _report_storage(self, options, enrollments, rows_before):
+        sample, scale = len(enrollments), options['enrollments']
+        if connection.vendor == 'postgresql':
+            rows_bytes = self._relation_size('lesson_progress') - rows_before
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT coalesce(sum(pg_column_size(completion_bits)), 0), "
+                    "coalesce(sum(pg_column_size(completion_times)), 0) FROM enrollments WHERE id = ANY(%s)",
+                    [[enrollment.id for enrollment in enrollments]],
+                )
+                bits_bytes, times_bytes = cursor.fetchone()
+        else:
+            # Without PostgreSQL only the bitset payload can be measured
+            rows_bytes = None
+            bits_bytes = sum(len(enrollment.completion_bits) for enrollment in enrollments)
+            times_bytes = sum(len(json.dumps(enrollment.completion_times)) for enrollment in enrollments)
+
+        def scaled(total):
+            return f"{total / sample:8.1f} B/enrollment  {total / sample * scale / 1024 ** 2:10.1f} MB at {scale:,}"
+
+        rows = LessonProgress.objects.filter(enrollment__in=enrollments).count()
+        self.stdout.write(f"Progress rows per enrollment: {rows / sample:.0f}")
+        if rows_bytes is not None:
+            self.stdout.write(f"row-per-lesson (table + indexes) {scaled(rows_bytes)}")
+        else:
+            self.stdout.write("row-per-lesson (table + indexes) measured on PostgreSQL only")
+        self.stdout.write(f"bitset                           {scaled(bits_bytes)}")
+        self.stdout.write(f"bitset + completion times        {scaled(bits_bytes + times_bytes)}")
+
+    def _report_lookups(self, options, enrollments, lessons):
+        orders = [lesson.order for lesson in lessons]
+        probes = [(random.choice(enrollments).id, random.choice(orders)) for _ in range(options['lookups'])]
+
+        def rows_is_done(enrollment_id, order):
+            return LessonProgress.objects.filter(
+                enrollment_id=enrollment_id, lesson__order=order, completed=True
+            ).exists()
+
+        def bits_is_done(enrollment_id, order):
+            data = Enrollment.objects.filter(pk=enrollment_id).values_list('completion_bits', flat=True).get()
+            return CompletionBitset(data).is_done(order)
+
+        def rows_first_incomplete(enrollment_id, order):
+            return LessonProgress.objects.filter(enrollment_id=enrollment_id, completed=False).order_by(
+                'lesson__order'
+            ).values_list('lesson__order', flat=True).first()
+
+        def bits_first_incomplete(enrollment_id, order):
+            data = Enrollment.objects.filter(pk=enrollment_id).values_list('completion_bits', flat=True).get()
+            return CompletionBitset(data).first_incomplete(orders)
+
+        for label, lookup in [
+            ('is lesson k done, rows', rows_is_done),
+            ('is lesson k done, bitset', bits_is_done),
+            ('first incomplete, rows', rows_first_incomplete),
+            ('first incomplete, bitset', bits_first_incomplete),
+        ]:
+            timings = []
+            for enrollment_id, order in probes:
+                started = time.perf_counter()
+                lookup(enrollment_id, order)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f"{label:<26} median {statistics.median(timings) * 1e6:8.1f} us   "
+                f"p95 {timings[int(len(timings) * 0.95)] * 1e6:8.1f} us"
+            )
+
+        bits = CompletionBitset(enrollments[0].completion_bits)
+        started = time.perf_counter()
+        for _, order in probes:
+            bits.is_done(order)
+        self.stdout.write(
+            f"bitset check in memory     {(time.perf_counter() - started) / len(probes) * 1e9:8.0f} ns "
+            f"(no query once the enrollment is loaded)"
+        )
@@ -0,0 +1,120 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.auth.models import User, Role
+from apps.courses.allocators import course_code_allocator
+from apps.courses.models.course import Course
+from apps.courses.models.lesson import Lesson
+from apps.courses.search import search_courses, search_lessons, uses_full_text_search
+
+
+VOCABULARY = [
+    'algebra', 'biology', 'chemistry', 'design', 'economics', 'finance', 'geometry', 'history',
+    'interface', 'journalism', 'kinetics', 'literature', 'marketing', 'networking', 'optics',
+    'painting', 'quantum', 'rhetoric', 'statistics', 'typography', 'urbanism', 'vectors',
+    'writing', 'xenology', 'yoga', 'zoology', 'python', 'django', 'database', 'index',
+    'function', 'variable', 'recursion', 'graph', 'matrix', 'theorem', 'proof', 'essay',
+]
+FILLER = ['the', 'a', 'of', 'and', 'to', 'in', 'with', 'for', 'on', 'is', 'this', 'that']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic lesson corpus and measure course/lesson search latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=100_000)
+        parser.add_argument('--lessons-per-course', type=int, default=50)
+        parser.add_argument('--words-per-lesson', type=int, default=300)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of rolling it back.')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        try:
+            with transaction.atomic():
+                self._seed(options)
+                self._measure(options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Seeded data rolled back.')
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        instructor, _ = User.objects.get_or_create(
+            email='bench-search@example.com',
+            defaults={'full_name': 'Benchmark Instructor', 'role': Role.INSTRUCTOR},
+        )
+        course_count = max(1, options['lessons'] // options['lessons_per_course'])
+        courses = Course.objects.bulk_create([
+            Course(
+                code=course_code_allocator.next_code(),
+                title=f"{random.choice(VOCABULARY).title()} {i}",
+                short_description=self._text(30),
+                instructor=instructor,
+                status='published',
+            )
+            for i in range(course_count)
+        ])
+
+        batch = []
+        for index in range(options['lessons']):
+            course = courses[index % course_count]
+            batch.append(Lesson(
+                course=course,
+                title=f"{random.choice(VOCABULARY).title()} lesson {index}",
+                content=self._text(options['words_per_lesson']),
+                order=index // course_count + 1,
+            ))
+            if len(batch) == 5000:
+                Lesson.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Lesson.objects.bulk_create(batch)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE courses')
+                cursor.execute('ANALYZE lessons')
+
+        self.stdout.write(
+            f"Seeded {course_count} courses / {options['lessons']} lessons "
+            f"in {time.perf_counter() - started:.1f}s (full-text search: {uses_full_text_search()})"
+        )
+
+    def _text(self, words):
+        return ' '.join(
+            random.choice(VOCABULARY) if random.random() < 0.3 else random.choice(FILLER)
+            for _ in range(words)
+        )
+
+    def _measure(self, options):
+        terms = ['python', 'quantum optics', 'database index', 'xenology', 'nonexistentterm']
+        for label, search, queryset in (
+            ('lessons', search_lessons, Lesson.objects.all()),
+            ('courses', search_courses, Course.objects.filter(status='published')),
+        ):
+            for term in terms:
+                timings = []
+                for _ in range(options['runs']):
+                    started = time.perf_counter()
+                    list(search(queryset, term)[:20])
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                self.stdout.write(
+                    f"{label:<8} {term!r:<20} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms"
+                )
+
+            if connection.vendor == 'postgresql':
+                plan = search(queryset, terms[0])[:20].explain()
+                uses_index = 'search_vector_idx' in plan
+                self.stdout.write(f"{label:<8} plan uses GIN index: {uses_index}")
@@ -0,0 +1,103 @@
+import statistics
+import threading
+import time
+
+from celery import Celery
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+LONG_TASK = 'apps.courses.tasks.process_progress_backfill'
+SHORT_TASK = 'apps.courses.tasks.send_course_completion_notifications'
+
+# Queues consumed by each worker, as in docker-compose.yml
+WORKER_QUEUES = [['default', 'notifications'], ['bulk']]
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish a backlog of long tasks followed by short ones to an in-memory broker, once with every task in '
+        'the default queue and once routed by CELERY_TASK_ROUTES, and report how long the short tasks waited. '
+        'Worker threads stand in for the worker processes and sleep instead of running the tasks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--long', type=int, default=40, help='Long tasks queued first.')
+        parser.add_argument('--short', type=int, default=200, help='Short tasks queued after them.')
+        parser.add_argument('--long-seconds', type=float, default=0.2)
+        parser.add_argument('--short-seconds', type=float, default=0.005)
+        parser.add_argument('--workers', type=int, default=4, help='Worker threads in total.')
+
+    def handle(self, *args, **options):
+        self._run('single queue', self._app(routed=False), [['default']], [options['workers']], options)
+        half = max(options['workers'] // 2, 1)
+        self._run('routed queues', self._app(routed=True), WORKER_QUEUES, [half, half], options)
+
+    def _app(self, routed):
+        app = Celery('bench-task-queues', broker='memory://', set_as_current=False)
+        app.conf.task_default_queue = settings.CELERY_TASK_DEFAULT_QUEUE
+        app.conf.task_queues = settings.CELERY_TASK_QUEUES
+        app.conf.task_routes = settings.CELERY_TASK_ROUTES if routed else {}
+        app.conf.broker_transport_options = {'polling_interval': 0.001}
+        return app
+
+    def _run(self, label, app, worker_queues, worker_counts, options):
+        seconds = {'long': options['long_seconds'], 'short': options['short_seconds']}
+        totals = {'long': options['long'], 'short': options['short']}
+        waits = {'long': [], 'short': []}
+        finished = {'long': 0.0, 'short': 0.0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def consume(queues):
+            with app.connection_for_read() as connection:
+                consumers = [connection.SimpleQueue(app.amqp.queues[name], accept=['json']) for name in queues]
+                while not stop.is_set():
+                    for consumer in consumers:
+                        try:
+                            message = consumer.get_nowait()
+                            break
+                        except consumer.Empty:
+                            pass
+                    else:
+                        time.sleep(0.001)
+                        continue
+                    kind, sent = message.payload[0]
+                    with lock:
+                        waits[kind].append(time.perf_counter() - sent)
+                    time.sleep(seconds[kind])
+                    message.ack()
+                    with lock:
+                        finished[kind] = time.perf_counter()
+                for consumer in consumers:
+                    consumer.close()
+
+        threads = [
+            threading.Thread(target=consume, args=(queues,), daemon=True)
+            for queues, count in zip(worker_queues, worker_counts) for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+
+        started = time.perf_counter()
+        for name, kind in [(LONG_TASK, 'long'), (SHORT_TASK, 'short')]:
+            for _ in range(totals[kind]):
+                app.send_task(name, args=[kind, time.perf_counter()])
+        while any(len(waits[kind]) < totals[kind] for kind in totals):
+            time.sleep(0.01)
+        time.sleep(max(seconds.values()))
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        routes = ', '.join(
+            f"{kind} -> {app.amqp.router.route({}, name)['queue'].name}"
+            for name, kind in [(LONG_TASK, 'long'), (SHORT_TASK, 'short')]
+        )
+        self.stdout.write(f"{label} ({routes}; workers {worker_queues} x {worker_counts})")
+        for kind in ('short', 'long'):
+            values = sorted(waits[kind])
+            self.stdout.write(
+                f"  {kind:<5} wait median {statistics.median(values) * 1000:8.1f} ms  "
+                f"p95 {values[int(len(values) * 0.95)] * 1000:8.1f} ms  "
+                f"all done after {finished[kind] - started:6.2f}s"
+            )
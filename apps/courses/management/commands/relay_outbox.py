@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.tasks import drain_outbox, outbox_stats
+
+
+class Command(BaseCommand):
+    help = 'Publish pending outbox events to Celery, e.g. where Celery beat does not run the relay_outbox task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Defaults to OUTBOX_RELAY_BATCH_SIZE.')
+        parser.add_argument('--interval', type=float, default=None, help='Keep relaying, sleeping this many seconds between runs.')
+
+    def handle(self, *args, **options):
+        while True:
+            published = drain_outbox(batch_size=options['batch_size'])
+            stats = outbox_stats()
+            self.stdout.write(
+                f"Published {published} event(s) at {stats['last_run']['events_per_second']:,.0f} events/s; "
+                f"{stats['pending']} pending, lag {stats['lag_seconds']:.1f}s"
+            )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
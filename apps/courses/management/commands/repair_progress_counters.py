@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.counters import repair_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute Course.lesson_count and the completion bitset and completed_lessons of each enrollment.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows have drifted.')
+
+    def handle(self, *args, **options):
+        fixed = repair_counters(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = 'drifted' if options['dry_run'] else 'repaired'
+        for label, count in fixed.items():
+            self.stdout.write(f"{label}: {count} rows {verb}")
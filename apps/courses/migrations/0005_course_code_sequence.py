@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:40
+
+from django.db import migrations, models
+
+
+def _last_course_number(Course):
+    last_number = 0
+    for code in Course.objects.values_list('code', flat=True).iterator():
+        try:
+            last_number = max(last_number, int(code.split('-')[-1]))
+        except (IndexError, ValueError):
+            pass
+    return last_number
+
+
+def create_course_code_sequence(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CodeSequence = apps.get_model('courses', 'CodeSequence')
+    start = _last_course_number(Course) + 1
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS course_code_seq START WITH {start}")
+    else:
+        CodeSequence.objects.update_or_create(name='course_code', defaults={'next_value': start})
+
+
+def drop_course_code_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP SEQUENCE IF EXISTS course_code_seq')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'code_sequences',
+            },
+        ),
+        migrations.RunPython(create_course_code_sequence, drop_course_code_sequence),
+    ]
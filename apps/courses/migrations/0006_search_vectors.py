@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:05
+
+from django.conf import settings
+from django.db import migrations
+
+
+SEARCH_DOCUMENTS = {
+    'courses': ('title', 'short_description'),
+    'lessons': ('title', 'content'),
+}
+
+
+def create_search_vectors(apps, schema_editor):
+    """
+    Add a trigger-maintained `search_vector` column with a GIN index to courses
+    and lessons. Only PostgreSQL has full-text search; other databases use the
+    LIKE-based fallback in apps.courses.search.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    config = settings.SEARCH_CONFIG
+    for table, (primary, secondary) in SEARCH_DOCUMENTS.items():
+        document = (
+            f"setweight(to_tsvector('{config}', coalesce(NEW.{primary}, '')), 'A') || "
+            f"setweight(to_tsvector('{config}', coalesce(NEW.{secondary}, '')), 'B')"
+        )
+        schema_editor.execute(f"ALTER TABLE {table} ADD COLUMN search_vector tsvector")
+        schema_editor.execute(f"""
+            CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {document};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF {primary}, {secondary} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """)
+        schema_editor.execute(f"UPDATE {table} SET search_vector = {document.replace('NEW.', '')}")
+        schema_editor.execute(f"CREATE INDEX {table}_search_vector_idx ON {table} USING gin (search_vector)")
+
+
+def drop_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table in SEARCH_DOCUMENTS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}")
+        schema_editor.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+        schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_code_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vectors, drop_search_vectors),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.courses.content import decode_content, encode_content
+
+
+BATCH_SIZE = 500
+
+
+def move_content_to_store(apps, schema_editor):
+    Lesson = apps.get_model('courses', 'Lesson')
+    LessonContent = apps.get_model('courses', 'LessonContent')
+    db = schema_editor.connection.alias
+
+    batch = []
+    for lesson_id, content in Lesson.objects.using(db).values_list('id', 'content').iterator(chunk_size=BATCH_SIZE):
+        encoding, data, size = encode_content(content)
+        batch.append(LessonContent(lesson_id=lesson_id, revision=1, encoding=encoding, data=data, size=size))
+        if len(batch) == BATCH_SIZE:
+            LessonContent.objects.using(db).bulk_create(batch)
+            batch = []
+    if batch:
+        LessonContent.objects.using(db).bulk_create(batch)
+    Lesson.objects.using(db).update(content_revision=1)
+
+
+def restore_content_from_store(apps, schema_editor):
+    Lesson = apps.get_model('courses', 'Lesson')
+    LessonContent = apps.get_model('courses', 'LessonContent')
+    db = schema_editor.connection.alias
+
+    current = LessonContent.objects.using(db).filter(revision=models.F('lesson__content_revision'))
+    for row in current.iterator(chunk_size=BATCH_SIZE):
+        Lesson.objects.using(db).filter(pk=row.lesson_id).update(content=decode_content(row.encoding, row.data))
+
+
+def index_content_vectors(apps, schema_editor):
+    """
+    The lesson body column goes away, so the search trigger can no longer read
+    it. Keep a `content_vector` column (written by the application when a body
+    is stored) and fold it into `search_vector` instead.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    config = settings.SEARCH_CONFIG
+    schema_editor.execute("ALTER TABLE lessons ADD COLUMN content_vector tsvector")
+    schema_editor.execute(f"UPDATE lessons SET content_vector = to_tsvector('{config}', coalesce(content, ''))")
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION lessons_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := setweight(to_tsvector('{config}', coalesce(NEW.title, '')), 'A') ||
+                                 setweight(coalesce(NEW.content_vector, ''::tsvector), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("DROP TRIGGER IF EXISTS lessons_search_vector_trigger ON lessons")
+    schema_editor.execute("""
+        CREATE TRIGGER lessons_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, content_vector ON lessons
+        FOR EACH ROW EXECUTE FUNCTION lessons_search_vector_update()
+    """)
+
+
+def unindex_content_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    config = settings.SEARCH_CONFIG
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION lessons_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := setweight(to_tsvector('{config}', coalesce(NEW.title, '')), 'A') ||
+                                 setweight(to_tsvector('{config}', coalesce(NEW.content, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("DROP TRIGGER IF EXISTS lessons_search_vector_trigger ON lessons")
+    schema_editor.execute("""
+        CREATE TRIGGER lessons_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, content ON lessons
+        FOR EACH ROW EXECUTE FUNCTION lessons_search_vector_update()
+    """)
+    schema_editor.execute("ALTER TABLE lessons DROP COLUMN IF EXISTS content_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_search_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveIntegerField()),
+                ('encoding', models.CharField(choices=[('identity', 'Uncompressed'), ('gzip', 'gzip'), ('zstd', 'Zstandard')], max_length=10)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_revisions', to='courses.lesson')),
+            ],
+            options={
+                'db_table': 'lesson_contents',
+                'unique_together': {('lesson', 'revision')},
+            },
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='content_revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # A default lets the column be re-added when this migration is reversed
+        migrations.AlterField(
+            model_name='lesson',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(move_content_to_store, restore_content_from_store),
+        migrations.RunPython(index_content_vectors, unindex_content_vectors),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='content',
+        ),
+    ]
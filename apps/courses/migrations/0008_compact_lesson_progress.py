@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:20
+
+from django.db import migrations
+
+
+BATCH_SIZE = 5000
+
+
+def delete_untouched_progress(apps, schema_editor):
+    """Progress is now sparse: rows only exist for lessons that were completed."""
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+    db = schema_editor.connection.alias
+
+    untouched = LessonProgress.objects.using(db).filter(completed=False, completed_at__isnull=True)
+    while True:
+        ids = list(untouched.values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        LessonProgress.objects.using(db).filter(id__in=ids).delete()
+
+
+def materialize_progress(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Lesson = apps.get_model('courses', 'Lesson')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+    db = schema_editor.connection.alias
+
+    for enrollment in Enrollment.objects.using(db).only('id', 'course_id').iterator():
+        LessonProgress.objects.using(db).bulk_create(
+            [
+                LessonProgress(enrollment_id=enrollment.id, lesson_id=lesson_id, completed=False)
+                for lesson_id in Lesson.objects.using(db).filter(course_id=enrollment.course_id).values_list('id', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_lesson_content_store'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_untouched_progress, materialize_progress),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:30
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_by):
+    return Coalesce(
+        Subquery(queryset.order_by().values(group_by).annotate(total=Count('pk')).values('total')),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def populate_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Lesson = apps.get_model('courses', 'Lesson')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+    db = schema_editor.connection.alias
+
+    Course.objects.using(db).update(
+        lesson_count=_count(Lesson.objects.filter(course=OuterRef('pk')), 'course')
+    )
+    Enrollment.objects.using(db).update(
+        completed_lessons=_count(LessonProgress.objects.filter(enrollment=OuterRef('pk'), completed=True), 'enrollment')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_bulk_enrollment_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained when lessons are added or removed'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained when lesson progress is completed or removed'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+from apps.courses.bitset import CompletionBitset
+
+
+BATCH_SIZE = 5000
+
+
+def populate_completion_bits(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+    db = schema_editor.connection.alias
+
+    def flush(enrollment_id, bits, times):
+        Enrollment.objects.using(db).filter(pk=enrollment_id).update(completion_bits=bits.to_bytes(), completion_times=times)
+
+    current, bits, times = None, None, None
+    completed = LessonProgress.objects.using(db).filter(completed=True).order_by('enrollment_id').values_list(
+        'enrollment_id', 'lesson__order', 'completed_at'
+    )
+    for enrollment_id, order, completed_at in completed.iterator(chunk_size=BATCH_SIZE):
+        if enrollment_id != current:
+            if current is not None:
+                flush(current, bits, times)
+            current, bits, times = enrollment_id, CompletionBitset(), {}
+        bits.set(order)
+        if completed_at:
+            times[str(order)] = int(completed_at.timestamp())
+    if current is not None:
+        flush(current, bits, times)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completion_bits',
+            field=models.BinaryField(default=b'', help_text='Bit k-1 is set once the lesson with order k is completed'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completion_times',
+            field=models.JSONField(default=dict, editable=False, help_text='Completion time (Unix seconds) of each completed lesson, keyed by lesson order'),
+        ),
+        migrations.RunPython(populate_completion_bits, migrations.RunPython.noop),
+    ]
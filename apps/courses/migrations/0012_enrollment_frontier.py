@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+from apps.courses.bitset import CompletionBitset
+
+
+BATCH_SIZE = 2000
+
+
+def populate_frontier(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Lesson = apps.get_model('courses', 'Lesson')
+    db = schema_editor.connection.alias
+
+    orders = {}
+    for course_id, order in Lesson.objects.using(db).order_by('order').values_list('course_id', 'order'):
+        orders.setdefault(course_id, []).append(order)
+
+    batch = []
+    for enrollment in Enrollment.objects.using(db).only('course_id', 'completion_bits').iterator(chunk_size=BATCH_SIZE):
+        enrollment.frontier_order = CompletionBitset(enrollment.completion_bits).first_incomplete(
+            orders.get(enrollment.course_id, [])
+        )
+        batch.append(enrollment)
+        if len(batch) == BATCH_SIZE:
+            Enrollment.objects.using(db).bulk_update(batch, ['frontier_order'])
+            batch = []
+    Enrollment.objects.using(db).bulk_update(batch, ['frontier_order'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_enrollment_completion_bitset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='frontier_order',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Order of the first lesson not completed yet, every earlier lesson is; null once all are', null=True),
+        ),
+        migrations.RunPython(populate_frontier, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_enrollment_frontier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressBackfillJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('moves', models.JSONField(blank=True, default=list, help_text='Lesson order changes to apply, in the order they happened')),
+                ('last_enrollment_id', models.BigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_backfill_jobs', to='courses.course')),
+            ],
+            options={
+                'db_table': 'progress_backfill_jobs',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['course', 'status'], name='backfill_course_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyIfSupported(AddIndexConcurrently):
+    """
+    `CREATE INDEX CONCURRENTLY` on PostgreSQL, so writes to the table are not
+    blocked while the index builds; a plain `CREATE INDEX` elsewhere.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('courses', '0014_outbox_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='course',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-created_at', '-id'], name='courses_published_created_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='course',
+            index=models.Index(fields=['instructor', '-created_at', '-id'], name='courses_instructor_created_idx'),
+        ),
+    ]
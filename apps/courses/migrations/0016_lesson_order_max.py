@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='order',
+            field=models.PositiveIntegerField(help_text='Order of lesson within the course', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10000)]),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from enum import unique
 from django.db import models
+from django.db.models import F, Q
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from apps.base.models import BaseModel
 from apps.auth.models import User, Role
+from apps.courses.allocators import course_code_allocator
 
 
 class Course(BaseModel):    
@@ -16,10 +19,19 @@ class Course(BaseModel):
     short_description = models.TextField(max_length=500)
     instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='courses', limit_choices_to={'role': Role.INSTRUCTOR})
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    lesson_count = models.PositiveIntegerField(default=0, editable=False, help_text="Maintained when lessons are added or removed")
     
     class Meta:
         ordering = ['-created_at']
         db_table = 'courses'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='courses_created_id_idx'),
+            # The student catalog and an instructor's own courses, in cursor order
+            models.Index(
+                fields=['-created_at', '-id'], condition=Q(status='published'), name='courses_published_created_idx'
+            ),
+            models.Index(fields=['instructor', '-created_at', '-id'], name='courses_instructor_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -29,20 +41,15 @@ class Course(BaseModel):
         return self.status == 'published'
 
     def save(self, *args, **kwargs):
-        if not self.pk:
-            last_course = Course.objects.order_by('-id').first()
-            last_course_no = 0
-            if last_course:
-                last_course_code = last_course.code
-                try:
-                    last_course_no = int(last_course_code.split('-')[-1])
-                except (IndexError, ValueError):
-                    pass  
-            code = 'COURSE'
-            new_course_no = last_course_no + 1
-            new_course_code = f"{code}-{new_course_no:04d}"
-            self.code = new_course_code
+        if not self.pk and not self.code:
+            self.code = course_code_allocator.next_code(using=kwargs.get('using'))
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def adjust_lesson_count(cls, course_id, delta, using=None):
+        cls.objects.using(using).filter(pk=course_id).update(
+            lesson_count=F('lesson_count') + delta, updated_at=timezone.now()
+        )
 
 
 
@@ -1,7 +1,121 @@
-from django.db import models
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.db import connections, models, router, transaction
+from django.db.models import Case, F, Min, Q, Subquery, When
+from django.utils import timezone
 from apps.auth.models import User, Role
 from apps.courses.models.course import Course
 from apps.base.models import BaseModel
+from apps.courses.bitset import CompletionBitset
+
+
+def _lessons(using=None):
+    # Lesson imports this module, so the model is looked up lazily
+    return apps.get_model('courses', 'Lesson').objects.db_manager(using)
+
+
+class EnrollmentManager(models.Manager):
+    def enroll(self, student, course):
+        """
+        Create an enrollment with a single `INSERT ... ON CONFLICT DO NOTHING
+        RETURNING id` round trip. Returns None if the student is already
+        enrolled in the course. The frontier starts at the course's first
+        lesson, read by a subquery of the same statement.
+        """
+        enrollment = self.model(student=student, course=course)
+        connection = connections[self._db or router.db_for_write(self.model)]
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        lessons = _lessons().model._meta
+        fields = [field for field in opts.concrete_fields if not field.primary_key]
+        placeholders, values = [], []
+        for field in fields:
+            if field.name == 'frontier_order':
+                placeholders.append(
+                    f"(SELECT MIN({quote(lessons.get_field('order').column)}) FROM {quote(lessons.db_table)} "
+                    f"WHERE {quote(lessons.get_field('course').column)} = %s)"
+                )
+                values.append(course.pk)
+            else:
+                placeholders.append('%s')
+                values.append(field.get_db_prep_save(field.pre_save(enrollment, add=True), connection))
+        sql = (
+            f"INSERT INTO {quote(opts.db_table)} ({', '.join(quote(field.column) for field in fields)}) "
+            f"VALUES ({', '.join(placeholders)}) "
+            f"ON CONFLICT DO NOTHING RETURNING {quote(opts.pk.column)}, {quote(opts.get_field('frontier_order').column)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, values)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        enrollment.pk, enrollment.frontier_order = row
+        enrollment._state.adding = False
+        enrollment._state.db = connection.alias
+        return enrollment
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        course_ids = {enrollment.course_id for enrollment in objs if enrollment.frontier_order is None}
+        if course_ids:
+            first_orders = dict(_lessons(self.db).filter(course_id__in=course_ids).values('course_id').annotate(
+                first=Min('order')
+            ).values_list('course_id', 'first'))
+            for enrollment in objs:
+                if enrollment.frontier_order is None:
+                    enrollment.frontier_order = first_orders.get(enrollment.course_id)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def lesson_added(self, course_id, order):
+        """A new lesson is incomplete for everyone, so it caps every frontier beyond it."""
+        self.filter(course_id=course_id).filter(Q(frontier_order__isnull=True) | Q(frontier_order__gt=order)).update(
+            frontier_order=order
+        )
+
+    def lesson_removed(self, course_id, order):
+        """
+        A frontier on a removed lesson moves to the lesson now after it. The
+        backfill job later skips it past any of those already completed.
+        Enrollments that had completed the lesson, all with a frontier past it
+        and any with its bit set beyond theirs, stop counting it in the same
+        update.
+        """
+        enrollments = self.filter(course_id=course_id)
+        candidates = enrollments.filter(frontier_order__lt=order, completed_lessons__gt=0).order_by()
+        past_frontier = [
+            pk for pk, data in candidates.values_list('pk', 'completion_bits').iterator()
+            if CompletionBitset(data).is_done(order)
+        ]
+        counted = Q(frontier_order__isnull=True) | Q(frontier_order__gt=order) | Q(pk__in=past_frontier)
+        enrollments.filter(counted | Q(frontier_order=order)).update(
+            frontier_order=Case(
+                When(frontier_order=order, then=self._next_order(course_id, order)), default=F('frontier_order'),
+                output_field=models.PositiveIntegerField(),
+            ),
+            completed_lessons=Case(
+                When(counted & Q(completed_lessons__gt=0), then=F('completed_lessons') - 1), default=F('completed_lessons'),
+                output_field=models.PositiveIntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+    def lesson_moved(self, course_id, old_order, new_order):
+        """
+        A lesson moved before a frontier may be incomplete, so it caps the
+        frontiers it passed; moving it later vacates its old order like a removal.
+        """
+        if new_order < old_order:
+            self.filter(course_id=course_id, frontier_order__gt=new_order, frontier_order__lte=old_order).update(
+                frontier_order=new_order
+            )
+        else:
+            self.filter(course_id=course_id, frontier_order=old_order).update(
+                frontier_order=self._next_order(course_id, old_order)
+            )
+
+    def _next_order(self, course_id, order):
+        return Subquery(_lessons(self.db).filter(course_id=course_id, order__gt=order).order_by('order').values('order')[:1])
 
 
 class Enrollment(BaseModel): 
@@ -9,15 +123,276 @@ class Enrollment(BaseModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
     enrolled_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False, help_text="Maintained when lesson progress is completed or removed")
+    completion_bits = models.BinaryField(default=b'', editable=False, help_text="Bit k-1 is set once the lesson with order k is completed")
+    completion_times = models.JSONField(default=dict, editable=False, help_text="Completion time (Unix seconds) of each completed lesson, keyed by lesson order")
+    frontier_order = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Order of the first lesson not completed yet, every earlier lesson is; null once all are")
+
+    objects = EnrollmentManager()
     
     class Meta:
         unique_together = ['student', 'course']
         ordering = ['-enrolled_at']
         db_table = 'enrollments'
+        indexes = [
+            models.Index(fields=['student', '-enrolled_at', '-id'], name='enroll_student_enrolled_idx'),
+        ]
     
     @property
     def is_completed(self):
         return self.completed_at is not None
     
+    @property
+    def total_lessons(self):
+        return self.course.lesson_count
+    
+    @property
+    def completion_percentage(self):
+        total = self.total_lessons
+        return round((self.completed_lessons / total * 100) if total > 0 else 0.0, 2)
+    
+    @property
+    def completion(self):
+        return CompletionBitset(self.completion_bits)
+
+    @property
+    def completed_lesson_orders(self):
+        return self.completion.completed_orders()
+
+    def lesson_completed_at(self, order):
+        value = self.completion_times.get(str(order))
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc) if value is not None else None
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.frontier_order is None:
+            self.frontier_order = _lessons().filter(course_id=self.course_id).aggregate(first=Min('order'))['first']
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def record_completion(cls, enrollment_id, order, completed, completed_at=None, using=None):
+        """
+        Set the completion bit of lesson `order` and keep `completed_lessons`,
+        `completion_times` and `frontier_order` in step, under a lock on the
+        enrollment row. Returns True if the bit changed, so concurrent
+        completions of the same lesson count once.
+        """
+        with transaction.atomic(using=using):
+            enrollment = cls.objects.using(using).select_for_update().filter(pk=enrollment_id).only(
+                'course_id', 'completion_bits', 'completion_times', 'frontier_order'
+            ).first()
+            if enrollment is None:
+                return False
+            bits = enrollment.completion
+            if not bits.set(order, completed):
+                return False
+            times = dict(enrollment.completion_times)
+            frontier = enrollment.frontier_order
+            if completed:
+                times[str(order)] = int((completed_at or timezone.now()).timestamp())
+                if frontier == order:
+                    frontier = bits.first_incomplete(_lessons(using).filter(
+                        course_id=enrollment.course_id, order__gt=order
+                    ).order_by('order').values_list('order', flat=True))
+            else:
+                times.pop(str(order), None)
+                if frontier is None or order < frontier:
+                    frontier = order
+            cls.objects.using(using).filter(pk=enrollment_id).update(
+                completion_bits=bits.to_bytes(),
+                completion_times=times,
+                completed_lessons=F('completed_lessons') + (1 if completed else -1),
+                frontier_order=frontier,
+                updated_at=timezone.now(),
+            )
+            return True
+
+    @classmethod
+    def record_completions(cls, completions, using=None):
+        """
+        Batch form of `record_completion` for completing lessons, applied in
+        the given order: `completions` are `(enrollment_id, order,
+        completed_at)` tuples. A lesson past the enrollment's frontier at that
+        point is blocked, so a batch may complete a run of consecutive
+        lessons. The enrollments are locked and written back with one
+        `bulk_update`, and those whose last lesson got completed get
+        `completed_at` and a `course_completed` outbox event. Returns the
+        status of every completion (`completed`, `already_completed`,
+        `blocked` or `not_found`) and the enrollments completed by the batch.
+        """
+        with transaction.atomic(using=using):
+            enrollments = cls.objects.using(using).select_for_update().only(
+                'course_id', 'completion_bits', 'completion_times', 'frontier_order', 'completed_at'
+            ).in_bulk({enrollment_id for enrollment_id, _, _ in completions})
+            lesson_orders = {}
+            for course_id, order in _lessons(using).filter(
+                course_id__in={enrollment.course_id for enrollment in enrollments.values()}
+            ).order_by('course_id', 'order').values_list('course_id', 'order'):
+                lesson_orders.setdefault(course_id, []).append(order)
+
+            bitsets, changed, statuses = {}, set(), []
+            for enrollment_id, order, completed_at in completions:
+                enrollment = enrollments.get(enrollment_id)
+                if enrollment is None:
+                    statuses.append('not_found')
+                    continue
+                if enrollment_id not in bitsets:
+                    bitsets[enrollment_id] = enrollment.completion
+                bits = bitsets[enrollment_id]
+                if bits.is_done(order):
+                    statuses.append('already_completed')
+                elif enrollment.frontier_order is None or order > enrollment.frontier_order:
+                    statuses.append('blocked')
+                else:
+                    bits.set(order)
+                    enrollment.completion_times[str(order)] = int(completed_at.timestamp())
+                    if order == enrollment.frontier_order:
+                        enrollment.frontier_order = bits.first_incomplete(
+                            later for later in lesson_orders[enrollment.course_id] if later > order
+                        )
+                    changed.add(enrollment_id)
+                    statuses.append('completed')
+
+            now = timezone.now()
+            finished = []
+            for enrollment_id in changed:
+                enrollment, bits = enrollments[enrollment_id], bitsets[enrollment_id]
+                enrollment.completion_bits = bits.to_bytes()
+                # Bits of lessons removed since are left to the backfill job, so only current lessons count
+                orders = lesson_orders.get(enrollment.course_id, ())
+                enrollment.completed_lessons = sum(bits.is_done(order) for order in orders)
+                enrollment.updated_at = now
+                if enrollment.completed_at is None and orders and enrollment.frontier_order is None:
+                    enrollment.completed_at = now
+                    finished.append(enrollment)
+            OutboxEvent.objects.db_manager(using).enqueue(
+                OutboxEvent.COURSE_COMPLETED, [enrollment.pk for enrollment in finished]
+            )
+            cls.objects.using(using).bulk_update([enrollments[enrollment_id] for enrollment_id in changed], [
+                'completion_bits', 'completion_times', 'completed_lessons', 'frontier_order', 'completed_at', 'updated_at'
+            ])
+            return statuses, finished
+
     def __str__(self):
         return f"{self.student.email} - {self.course.title}"
+
+
+class BulkEnrollmentJob(BaseModel):
+    """
+    A batch of students to enroll into one course, processed in chunks by the
+    `process_bulk_enrollment` Celery task. `processed` is the number of entries
+    of `students` handled so far, so a retried job resumes where it stopped.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    MAX_ERRORS = 100
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='bulk_enrollment_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bulk_enrollment_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    students = models.JSONField(default=list, help_text="Student emails or ids, in request order")
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    enrolled = models.PositiveIntegerField(default=0)
+    already_enrolled = models.PositiveIntegerField(default=0)
+    invalid = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="First invalid entries and failure details")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        db_table = 'bulk_enrollment_jobs'
+
+    def __str__(self):
+        return f"Bulk enrollment #{self.pk} into {self.course_id} ({self.status})"
+
+
+class ProgressBackfillJob(BaseModel):
+    """
+    Brings the enrollments of a course in line with a change to its lessons:
+    `moves` are `[old_order, new_order]` pairs (new_order null for a deleted
+    lesson) applied to every completion bitset, after which the counters,
+    frontier and `completed_at` are re-evaluated. Enrollments are walked in
+    primary key order and `last_enrollment_id` is saved with every chunk, so a
+    job interrupted by a worker crash resumes where it stopped.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_backfill_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    moves = models.JSONField(default=list, blank=True, help_text="Lesson order changes to apply, in the order they happened")
+    last_enrollment_id = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        db_table = 'progress_backfill_jobs'
+        indexes = [
+            models.Index(fields=['course', 'status'], name='backfill_course_status_idx'),
+        ]
+
+    @property
+    def throughput(self):
+        """Enrollments processed per second."""
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return self.processed / elapsed if elapsed > 0 else float(self.processed)
+
+    def __str__(self):
+        return f"Progress backfill #{self.pk} for course {self.course_id} ({self.status})"
+
+
+class OutboxEventManager(models.Manager):
+    def enqueue(self, event_type, enrollment_ids):
+        """
+        Record events in the caller's transaction. An event that already
+        exists for the type and enrollment is left alone, published or not.
+        """
+        return self.bulk_create(
+            [self.model(event_type=event_type, enrollment_id=enrollment_id) for enrollment_id in enrollment_ids],
+            ignore_conflicts=True,
+        )
+
+
+class OutboxEvent(models.Model):
+    """
+    A Celery task to dispatch, written in the same transaction as the change
+    it reports and published by the `relay_outbox` task once that commits, so
+    requests never wait on the broker and a rolled back change never sends
+    anything. There is at most one event per type and enrollment.
+    """
+    COURSE_COMPLETED = 'course_completed'
+    EVENT_TYPE_CHOICES = [
+        (COURSE_COMPLETED, 'Course completed'),
+    ]
+
+    event_type = models.CharField(max_length=50, choices=EVENT_TYPE_CHOICES)
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='outbox_events')
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxEventManager()
+
+    class Meta:
+        unique_together = ['event_type', 'enrollment']
+        db_table = 'outbox_events'
+        indexes = [
+            models.Index(fields=['id'], condition=Q(published_at__isnull=True), name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} for enrollment {self.enrollment_id} ({'published' if self.published_at else 'pending'})"
@@ -1,14 +1,68 @@
-from django.db import models
-from django.core.validators import MinValueValidator
+from collections import Counter
+
+from django.db import models, router, transaction
+from django.db.models import F, Prefetch
+from django.core.validators import MaxValueValidator, MinValueValidator
 from apps.courses.models.course import Course
 from apps.courses.models.enrollment import Enrollment
 from apps.base.models import BaseModel
+from apps.courses.bitset import MAX_LESSON_ORDER
+from apps.courses.content import ENCODING_CHOICES, decode_content, encode_content, update_content_vectors
+
+
+def _schedule_backfill(course_id, move=None, using=None):
+    # The task module imports this one
+    from apps.courses.tasks import schedule_progress_backfill
+    return schedule_progress_backfill(course_id, move, using=using)
+
+
+class LessonQuerySet(models.QuerySet):
+    def with_content(self):
+        """Load the current body of every lesson in one extra query."""
+        return self.prefetch_related(Prefetch(
+            'content_revisions',
+            queryset=LessonContent.objects.filter(revision=F('lesson__content_revision')),
+            to_attr='_current_content',
+        ))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            for lesson in objs:
+                if lesson._content_changed:
+                    lesson.content_revision += 1
+            created = super().bulk_create(objs, *args, **kwargs)
+            LessonContent.store([lesson for lesson in created if lesson._content_changed and lesson.pk], self.db)
+            for course_id, count in Counter(lesson.course_id for lesson in created).items():
+                Course.adjust_lesson_count(course_id, count, using=self.db)
+                Enrollment.objects.db_manager(self.db).lesson_added(
+                    course_id, min(lesson.order for lesson in created if lesson.course_id == course_id)
+                )
+                _schedule_backfill(course_id, using=self.db)
+        return created
+
 
 class Lesson(BaseModel):
+    """
+    Lesson bodies live in `LessonContent`, keyed by lesson and revision, so
+    loading a lesson never reads them. `content` loads the current revision on
+    first access (use `Lesson.objects.with_content()` for lists), and assigning
+    to it stores a new revision on `save()`.
+    
+    Enrollment completion bits and frontiers are keyed by `order`; `save()`,
+    `delete()` and `bulk_create()` clamp the frontiers right away and queue a
+    `ProgressBackfillJob` to bring the rest of the course's enrollments in
+    step, `update(order=...)` does neither (run `repair_progress_counters`
+    afterwards).
+    """
     course = models.ForeignKey( Course, on_delete=models.CASCADE, related_name='lessons')
     title = models.CharField(max_length=255)
-    content = models.TextField()
-    order = models.PositiveIntegerField(validators=[MinValueValidator(1)], help_text="Order of lesson within the course")
+    content_revision = models.PositiveIntegerField(default=0)
+    order = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(MAX_LESSON_ORDER)], help_text="Order of lesson within the course")
+    
+    objects = LessonQuerySet.as_manager()
+    _content_changed = False
+    _loaded_order = None
     
     class Meta:
         ordering = ['course', 'order']
@@ -17,6 +71,107 @@ class Lesson(BaseModel):
     
     def __str__(self):
         return f"{self.course.title} - Lesson {self.order}: {self.title}"
+    
+    @property
+    def content(self):
+        if not hasattr(self, '_content'):
+            if hasattr(self, '_current_content'):
+                current = self._current_content[0] if self._current_content else None
+            elif self.pk and self.content_revision:
+                current = LessonContent.objects.filter(lesson_id=self.pk, revision=self.content_revision).first()
+            else:
+                current = None
+            self._content = current.text if current else ''
+        return self._content
+    
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self._content_changed = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        lesson = super().from_db(db, field_names, values)
+        # Completion bits are indexed by order, see `save()`
+        lesson._loaded_order = lesson.__dict__.get('order')
+        return lesson
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_order = self.__dict__.get('order')
+        if not self._content_changed:
+            self.__dict__.pop('_content', None)
+            self.__dict__.pop('_current_content', None)
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        old_order = self._loaded_order
+        reordered = not adding and old_order is not None and old_order != self.order
+        if not adding and not self._content_changed and not reordered:
+            return super().save(*args, **kwargs)
+        
+        using = kwargs.get('using') or router.db_for_write(Lesson, instance=self)
+        with transaction.atomic(using=using):
+            content_changed = self._content_changed
+            if content_changed:
+                if not adding:
+                    # Lock the row so concurrent edits get consecutive revisions
+                    current = Lesson.objects.using(using).select_for_update().filter(pk=self.pk).values_list(
+                        'content_revision', flat=True
+                    ).first()
+                    self.content_revision = current or 0
+                self.content_revision += 1
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'content_revision'}
+            super().save(*args, **kwargs)
+            if content_changed:
+                LessonContent.store([self], using)
+            if adding:
+                Course.adjust_lesson_count(self.course_id, 1, using=using)
+                # Frontiers are capped right away, the rest is left to the backfill job
+                Enrollment.objects.db_manager(using).lesson_added(self.course_id, self.order)
+                _schedule_backfill(self.course_id, using=using)
+            if reordered:
+                Enrollment.objects.db_manager(using).lesson_moved(self.course_id, old_order, self.order)
+                _schedule_backfill(self.course_id, (old_order, self.order), using=using)
+        self._loaded_order = self.order
+
+
+class LessonContent(models.Model):
+    """
+    One revision of a lesson body. Bodies above
+    `LESSON_CONTENT_COMPRESSION_THRESHOLD` bytes are stored compressed; `size`
+    is always the uncompressed length in bytes.
+    """
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='content_revisions')
+    revision = models.PositiveIntegerField()
+    encoding = models.CharField(max_length=10, choices=ENCODING_CHOICES)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['lesson', 'revision']
+        db_table = 'lesson_contents'
+    
+    def __str__(self):
+        return f"Lesson {self.lesson_id} revision {self.revision} ({self.encoding}, {self.size} bytes)"
+    
+    @property
+    def text(self):
+        return decode_content(self.encoding, self.data)
+    
+    @classmethod
+    def store(cls, lessons, using):
+        """Write the pending body of each lesson as its `content_revision`."""
+        rows = []
+        for lesson in lessons:
+            encoding, data, size = encode_content(lesson._content)
+            rows.append(cls(lesson=lesson, revision=lesson.content_revision, encoding=encoding, data=data, size=size))
+        cls.objects.using(using).bulk_create(rows)
+        update_content_vectors([(lesson.pk, lesson._content) for lesson in lessons], using)
+        for lesson in lessons:
+            lesson._content_changed = False
 
 
 
@@ -33,3 +188,19 @@ class LessonProgress(BaseModel):
     def __str__(self):
         status = "Completed" if self.completed else "In Progress"
         return f"{self.enrollment.student.email} - {self.lesson.title} ({status})"
+    
+    def save(self, *args, **kwargs):
+        """
+        Keep the enrollment's completion bitset (and with it
+        `Enrollment.completed_lessons`) in step with this row in the same
+        transaction. `Enrollment.record_completion` only counts a change of the
+        bit, so concurrent saves of the same completion count once.
+        """
+        using = kwargs.get('using') or router.db_for_write(LessonProgress, instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if self.completed or not adding:
+                Enrollment.record_completion(
+                    self.enrollment_id, self.lesson.order, self.completed, self.completed_at, using=using
+                )
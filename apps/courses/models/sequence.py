@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class CodeSequence(models.Model):
+    """
+    Portable counter used to hand out blocks of course codes on databases
+    without native sequences (e.g. SQLite in tests).
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        db_table = 'code_sequences'
+
+    def __str__(self):
+        return f"{self.name} ({self.next_value})"
@@ -24,19 +24,40 @@ class IsStudent(permissions.BasePermission):
         )
 
 
-class IsCourseOwner(permissions.BasePermission):
-    message = "You can only manage your own courses."
+class IsInstructorOrAdmin(permissions.BasePermission):
+    message = "Only instructors and administrators can access this resource."
     
-    def has_object_permission(self, request, view, obj):
-        return obj.instructor == request.user
+    def has_permission(self, request, view):
+        return (
+            request.user and
+            request.user.is_authenticated and
+            (request.user.role == Role.INSTRUCTOR or request.user.is_staff)
+        )
 
 
-class IsEnrollmentOwner(permissions.BasePermission):
-    message = "You can only access your own enrollments."
+class IsOwner(permissions.BasePermission):
+    """
+    The user owns the object according to the view's `owner_field`, the path
+    from the object to its owner's id (`student_id`, `enrollment__student_id`).
+    Objects looked up by `OwnedObjectMixin` carry the answer in `is_owned`.
+    """
     
     def has_object_permission(self, request, view, obj):
-        if hasattr(obj, 'student'):
-            return obj.student == request.user
-        elif hasattr(obj, 'enrollment'):
-            return obj.enrollment.student == request.user
-        return False
+        if hasattr(obj, 'is_owned'):
+            return obj.is_owned
+        value = obj
+        for name in view.owner_field.split('__'):
+            value = getattr(value, name)
+        return value == request.user.id
+
+
+class IsCourseOwner(IsOwner):
+    message = "You can only manage your own courses."
+
+
+class IsLessonOwner(IsOwner):
+    message = "You can only manage lessons in your own courses."
+
+
+class IsEnrollmentOwner(IsOwner):
+    message = "You can only access your own enrollments."
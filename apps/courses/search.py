@@ -0,0 +1,140 @@
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection
+from django.db.models import Case, Exists, Expression, IntegerField, OuterRef, Q, TextField, Value, When
+from django.db.models.functions import Cast
+from rest_framework.filters import BaseFilterBackend
+
+from apps.courses.content import IDENTITY
+from apps.courses.models.lesson import Lesson, LessonContent
+
+
+class SearchVectorColumn(Expression):
+    """
+    Reference to the `search_vector` column. The column only exists on
+    PostgreSQL and is maintained by triggers, so it is deliberately not a model
+    field: regular queries never select the tsvector.
+    """
+    contains_column_references = True
+
+    def __init__(self, column='search_vector', alias=None):
+        super().__init__(output_field=SearchVectorField())
+        self.column = column
+        self.alias = alias
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        clone = self.copy()
+        clone.alias = query.get_initial_alias()
+        return clone
+
+    def relabeled_clone(self, relabels):
+        return self.__class__(self.column, relabels.get(self.alias, self.alias))
+
+    def as_sql(self, compiler, connection):
+        return f"{compiler.quote_name_unless_alias(self.alias)}.{connection.ops.quote_name(self.column)}", []
+
+    def get_group_by_cols(self):
+        return [self]
+
+
+def uses_full_text_search():
+    return connection.vendor == 'postgresql'
+
+
+def _search_query(term):
+    return SearchQuery(term, search_type='websearch', config=settings.SEARCH_CONFIG)
+
+
+def _words(term):
+    return [word for word in term.split() if word]
+
+
+def _all_words(fields, term):
+    """SQLite fallback: every word has to appear in at least one of the fields."""
+    return reduce(and_, (
+        reduce(lambda q, field: q | Q(**{f"{field}__icontains": word}), fields, Q())
+        for word in _words(term)
+    ))
+
+
+def _lesson_words(term):
+    """
+    SQLite fallback for lessons: every word has to appear in the title or in
+    the current body. Compressed bodies cannot be matched with LIKE, so only
+    bodies stored uncompressed are searched.
+    """
+    conditions = []
+    for word in _words(term):
+        body = LessonContent.objects.filter(
+            lesson=OuterRef('pk'), revision=OuterRef('content_revision'), encoding=IDENTITY
+        ).annotate(text=Cast('data', TextField())).filter(text__icontains=word)
+        conditions.append(Q(title__icontains=word) | Exists(body))
+    return reduce(and_, conditions)
+
+
+def search_lessons(queryset, term):
+    if uses_full_text_search():
+        query = _search_query(term)
+        return queryset.alias(document=SearchVectorColumn()).filter(document=query).annotate(
+            rank=SearchRank(SearchVectorColumn(), query)
+        ).order_by('-rank', 'course_id', 'order')
+
+    return queryset.filter(_lesson_words(term)).annotate(
+        rank=Case(When(_all_words(['title'], term), then=Value(1)), default=Value(0), output_field=IntegerField())
+    ).order_by('-rank', 'course_id', 'order')
+
+
+def search_courses(queryset, term):
+    """
+    Match courses on their own title/description or on any of their lessons.
+    Courses matching directly rank above courses matched only through lessons.
+    """
+    if uses_full_text_search():
+        query = _search_query(term)
+        lesson_match = Lesson.objects.filter(course=OuterRef('pk')).alias(
+            document=SearchVectorColumn()
+        ).filter(document=query)
+        return queryset.alias(document=SearchVectorColumn()).filter(
+            Q(document=query) | Exists(lesson_match)
+        ).annotate(
+            rank=SearchRank(SearchVectorColumn(), query)
+        ).order_by('-rank', '-created_at', '-id')
+
+    lesson_match = Lesson.objects.filter(course=OuterRef('pk')).filter(_lesson_words(term))
+    return queryset.filter(
+        _all_words(['title', 'short_description'], term) | Exists(lesson_match)
+    ).annotate(
+        rank=Case(
+            When(_all_words(['title'], term), then=Value(2)),
+            When(_all_words(['title', 'short_description'], term), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    ).order_by('-rank', '-created_at', '-id')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    `?search=` for list actions. Views name the search function to use through
+    `search_function`; results are restricted to the view's own queryset, so the
+    role scoping from `get_queryset` still applies.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term or getattr(view, 'action', None) != 'list':
+            return queryset
+        return view.search_function(queryset, term)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search terms.',
+            'schema': {'type': 'string'},
+        }]
@@ -1,11 +1,15 @@
 from rest_framework import serializers
+from apps.base.serializers import SparseFieldsetsMixin
 from apps.courses.models.course import Course
-from apps.courses.serializers.lesson import LessonSerializer
+from apps.courses.serializers.lesson import LessonSerializer, LessonSummarySerializer
 
-class CourseSerializer(serializers.ModelSerializer):
-    lessons = LessonSerializer(many=True, read_only=True)
+class CourseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Detail representation. Nested lessons are summaries unless their bodies are
+    requested through `?expand=lessons.content`.
+    """
+    lessons = LessonSummarySerializer(many=True, read_only=True)
     instructor_name = serializers.CharField(source='instructor.full_name', read_only=True)
-    lesson_count = serializers.IntegerField(source='lessons.count', read_only=True)
     
     class Meta:
         model = Course
@@ -14,6 +18,36 @@ class CourseSerializer(serializers.ModelSerializer):
             'status', 'lesson_count', 'lessons', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'instructor_name','instructor', 'lesson_count', 'code']
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'lessons' in self.fields and 'lessons.content' in self.context.get('expand', set()):
+            self.fields['lessons'] = LessonSerializer(many=True, read_only=True)
+
+
+class CourseListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Summary representation used by list actions. `instructor_name` is read from
+    a queryset annotation, and lessons are only included when requested through
+    `?expand=lessons` or `?expand=lessons.content`.
+    """
+    instructor_name = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Course
+        fields = [
+            'id', 'code', 'title', 'short_description', 'instructor', 'instructor_name',
+            'status', 'lesson_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', set())
+        if 'lessons.content' in expand:
+            self.fields['lessons'] = LessonSerializer(many=True, read_only=True)
+        elif 'lessons' in expand:
+            self.fields['lessons'] = LessonSummarySerializer(many=True, read_only=True)
 
 
 class CourseCreateSerializer(serializers.ModelSerializer):
@@ -1,8 +1,16 @@
+import csv
+import io
+
+from django.conf import settings
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from apps.courses.models.enrollment import Enrollment
+from apps.base.serializers import SparseFieldsetsMixin
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import BulkEnrollmentJob, Enrollment
 
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
     student_name = serializers.CharField(source='student.full_name', read_only=True)
     is_completed = serializers.BooleanField(read_only=True)
@@ -14,22 +22,121 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'enrolled_at', 'completed_at', 'is_completed', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'student', 'enrolled_at', 'completed_at', 'is_completed', 'created_at', 'updated_at']
+        field_dependencies = {'is_completed': ['completed_at']}
 
 
-class EnrollmentProgressSerializer(serializers.ModelSerializer):
+class EnrollmentProgressSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
-    total_lessons = serializers.IntegerField(read_only=True)
-    completed_lessons = serializers.IntegerField(read_only=True)
+    total_lessons = serializers.IntegerField(source='course.lesson_count', read_only=True)
     completion_percentage = serializers.FloatField(read_only=True)
     is_completed = serializers.BooleanField(read_only=True)
+    completed_lesson_orders = serializers.ListField(child=serializers.IntegerField(), read_only=True)
     
     class Meta:
         model = Enrollment
         fields = [
             'id', 'course', 'course_title', 'enrolled_at', 'completed_at',
-            'is_completed', 'total_lessons', 'completed_lessons',
+            'is_completed', 'total_lessons', 'completed_lessons', 'completed_lesson_orders',
             'completion_percentage', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'enrolled_at', 'completed_at', 'is_completed',
                           'total_lessons', 'completed_lessons', 'completion_percentage',
-                          'created_at', 'updated_at']
\ No newline at end of file
+                          'created_at', 'updated_at']
+        field_dependencies = {
+            'is_completed': ['completed_at'],
+            'completion_percentage': ['completed_lessons'],
+            'completed_lesson_orders': ['completion_bits'],
+        }
+
+
+class EnrollmentDashboardSerializer(serializers.ModelSerializer):
+    """
+    One row of the student dashboard. Expects the `next_lesson_id` and
+    `next_lesson_title` annotations added by `EnrollmentViewSet.dashboard`.
+    """
+    course_title = serializers.CharField(source='course.title', read_only=True)
+    total_lessons = serializers.IntegerField(source='course.lesson_count', read_only=True)
+    completion_percentage = serializers.FloatField(read_only=True)
+    is_completed = serializers.BooleanField(read_only=True)
+    next_lesson = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Enrollment
+        fields = [
+            'id', 'course', 'course_title', 'enrolled_at', 'completed_at', 'is_completed',
+            'total_lessons', 'completed_lessons', 'completion_percentage', 'next_lesson'
+        ]
+        read_only_fields = fields
+    
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_next_lesson(self, enrollment):
+        if enrollment.next_lesson_id is None:
+            return None
+        return {'id': enrollment.next_lesson_id, 'title': enrollment.next_lesson_title, 'order': enrollment.frontier_order}
+
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """
+    Students to enroll into a course, given either as a `students` list of
+    emails/ids or as an uploaded CSV `file` whose first column holds them
+    (an `email`/`id` header row is skipped).
+    """
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    students = serializers.ListField(child=serializers.CharField(max_length=254), required=False)
+    file = serializers.FileField(required=False, write_only=True)
+    
+    def validate_course(self, course):
+        user = self.context['request'].user
+        if course.instructor_id != user.id and not user.is_staff:
+            raise serializers.ValidationError("You can only enroll students into your own courses")
+        if course.status != 'published':
+            raise serializers.ValidationError("Only published courses can be enrolled in")
+        return course
+    
+    def validate(self, attrs):
+        if 'file' in attrs:
+            try:
+                text = attrs.pop('file').read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise serializers.ValidationError({"file": "The file must be UTF-8 encoded CSV."})
+            rows = [row for row in csv.reader(io.StringIO(text)) if row and row[0].strip()]
+            if rows and rows[0][0].strip().lower() in ('email', 'id', 'student'):
+                rows = rows[1:]
+            raw = [row[0] for row in rows]
+        elif 'students' in attrs:
+            raw = attrs['students']
+        else:
+            raise serializers.ValidationError({"students": "Provide a list of students or a CSV file."})
+        
+        # Ids become ints so the worker can tell them from emails, which are
+        # matched case-insensitively; duplicates are dropped
+        students = list(dict.fromkeys(
+            int(value) if value.isdigit() else value.lower()
+            for value in (item.strip() for item in raw) if value
+        ))
+        if not students:
+            raise serializers.ValidationError({"students": "At least one student is required."})
+        if len(students) > settings.BULK_ENROLLMENT_MAX_STUDENTS:
+            raise serializers.ValidationError(
+                {"students": f"At most {settings.BULK_ENROLLMENT_MAX_STUDENTS} students can be enrolled at once."}
+            )
+        attrs['students'] = students
+        return attrs
+    
+    def create(self, validated_data):
+        return BulkEnrollmentJob.objects.create(
+            course=validated_data['course'],
+            requested_by=self.context['request'].user,
+            students=validated_data['students'],
+            total=len(validated_data['students']),
+        )
+
+
+class BulkEnrollmentJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BulkEnrollmentJob
+        fields = [
+            'id', 'course', 'status', 'total', 'processed', 'enrolled', 'already_enrolled',
+            'invalid', 'errors', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
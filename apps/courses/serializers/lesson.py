@@ -1,22 +1,40 @@
+from django.conf import settings
 from rest_framework import serializers
+from apps.base.serializers import SparseFieldsetsMixin
+from apps.courses.bitset import MAX_LESSON_ORDER
 from apps.courses.models.lesson import Lesson, LessonProgress
+from apps.courses.cache import catalog_cache
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    content = serializers.CharField()
+    
     class Meta:
         model = Lesson
         fields = ['id', 'title', 'content', 'order', 'course', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at', 'course']
+        field_dependencies = {'content': ['content_revision']}
+
+
+class LessonSummarySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'order']
+        read_only_fields = fields
 
 
 
 class LessonCreateSerializer(serializers.ModelSerializer):
+    content = serializers.CharField()
+    
     class Meta:
         model = Lesson
         fields = ['title', 'content', 'order', 'course']
     
     def create(self, validated_data):
-        validated_data['course'] = self.context['course']
+        # The view passes the checked course to save(); a context course overrides it
+        if 'course' in self.context:
+            validated_data['course'] = self.context['course']
         return super().create(validated_data)
 
 
@@ -24,7 +42,7 @@ class LessonCreateSerializer(serializers.ModelSerializer):
 class LessonBulkItemSerializer(serializers.Serializer):
     title = serializers.CharField(max_length=255)
     content = serializers.CharField()
-    order = serializers.IntegerField(min_value=1)
+    order = serializers.IntegerField(min_value=1, max_value=MAX_LESSON_ORDER)
 
 
 class LessonBulkCreateSerializer(serializers.Serializer):
@@ -50,7 +68,7 @@ class LessonBulkCreateSerializer(serializers.Serializer):
         except Course.DoesNotExist:
             raise serializers.ValidationError({"course": "Course not found"})
         
-        if course.instructor != self.context['request'].user:
+        if course.instructor_id != self.context['request'].user.id:
             raise serializers.ValidationError({"course": "You can only add lessons to your own courses"})
         
         existing_orders = set(course.lessons.values_list('order', flat=True))
@@ -61,30 +79,31 @@ class LessonBulkCreateSerializer(serializers.Serializer):
                 {"lessons": f"Lesson orders {sorted(conflicting_orders)} already exist in this course."}
             )
         
+        # Keep the checked course for create()
+        attrs['course'] = course
         return attrs
     
     def create(self, validated_data):
-        course_id = validated_data.pop('course')
+        course = validated_data.pop('course')
         lessons_data = validated_data.pop('lessons')
         
-        from apps.courses.models.course import Course
-        course = Course.objects.get(id=course_id)
-        
-        lessons = []
-        for lesson_data in lessons_data:
-            lesson = Lesson.objects.create(
+        lessons = Lesson.objects.bulk_create([
+            Lesson(
                 course=course,
                 title=lesson_data['title'],
                 content=lesson_data['content'],
                 order=lesson_data['order']
             )
-            lessons.append(lesson)
+            for lesson_data in lessons_data
+        ])
+        # bulk_create bypasses post_save, so invalidate the cached catalog explicitly
+        catalog_cache.bump_on_commit(course.id)
         
         return lessons
 
 
 
-class LessonProgressSerializer(serializers.ModelSerializer):
+class LessonProgressSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     lesson_title = serializers.CharField(source='lesson.title', read_only=True)
     
     class Meta:
@@ -101,3 +120,38 @@ class LessonProgressSerializer(serializers.ModelSerializer):
             validated_data['completed_at'] = timezone.now()
         return super().update(instance, validated_data)
 
+
+
+class LessonCompletionItemSerializer(serializers.Serializer):
+    progress = serializers.IntegerField(required=False, min_value=1)
+    lesson = serializers.IntegerField(required=False, min_value=1)
+    completed_at = serializers.DateTimeField(required=False, help_text="When the client completed the lesson")
+    
+    def validate(self, attrs):
+        if ('progress' in attrs) == ('lesson' in attrs):
+            raise serializers.ValidationError("Give either a progress ID or a lesson ID.")
+        return attrs
+
+
+class LessonCompletionBatchSerializer(serializers.Serializer):
+    """
+    Completions queued by a client, e.g. while offline. Each item names a
+    progress record or a lesson of an enrolled course, with an optional
+    client timestamp.
+    """
+    items = LessonCompletionItemSerializer(many=True)
+    
+    def validate_items(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one item is required.")
+        if len(value) > settings.PROGRESS_BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.PROGRESS_BATCH_MAX_ITEMS} items can be sent at once.")
+        return value
+
+
+class LessonCompletionResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField(help_text="Position of the item in the request")
+    lesson = serializers.IntegerField(allow_null=True)
+    status = serializers.ChoiceField(choices=['completed', 'already_completed', 'blocked', 'not_found'])
+    completed_at = serializers.DateTimeField(allow_null=True)
+    error = serializers.CharField(required=False)
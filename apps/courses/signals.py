@@ -0,0 +1,44 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.courses.cache import catalog_cache
+from apps.courses.models.course import Course
+from apps.courses.models.enrollment import Enrollment
+from apps.courses.models.lesson import Lesson, LessonProgress
+from apps.courses.tasks import schedule_progress_backfill
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_catalog(sender, instance, **kwargs):
+    catalog_cache.bump_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_catalog(sender, instance, **kwargs):
+    catalog_cache.bump_on_commit(instance.course_id)
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_delete, sender=Lesson)
+def decrement_lesson_count(sender, instance, using, origin=None, **kwargs):
+    Course.adjust_lesson_count(instance.course_id, -1, using=using)
+    if _origin_model(origin) is not Course:
+        Enrollment.objects.db_manager(using).lesson_removed(instance.course_id, instance.order)
+        schedule_progress_backfill(instance.course_id, (instance.order, None), using=using)
+
+
+@receiver(post_delete, sender=LessonProgress)
+def decrement_completed_lessons(sender, instance, using, origin=None, **kwargs):
+    # Progress removed with its lesson is handled by the backfill job, and with
+    # its enrollment there is nothing left to update
+    if not instance.completed or _origin_model(origin) is not LessonProgress:
+        return
+    order = Lesson.objects.using(using).filter(pk=instance.lesson_id).values_list('order', flat=True).first()
+    if order is not None:
+        Enrollment.record_completion(instance.enrollment_id, order, False, using=using)
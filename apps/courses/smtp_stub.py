@@ -0,0 +1,101 @@
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for `smtplib` and Django's SMTP backend."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost ESMTP stand-in')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode('ascii', 'replace').strip()[:4].upper()
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                if server.should_drop():
+                    return
+                self.reply('250 OK')
+            elif verb in ('RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(line)
+                with server.lock:
+                    server.messages.append(b''.join(data))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    SMTP server on a free localhost port, for tests and benchmarks. Accepts
+    every message into `messages` and counts `connections`. With
+    `drop_after=n` it hangs up once, when a message arrives after n were
+    accepted, to simulate a transient failure. `settings()` returns the
+    overrides that point Django's SMTP backend at it.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, drop_after=None):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.drop_after = drop_after
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def should_drop(self):
+        with self.lock:
+            if self.drop_after is not None and len(self.messages) >= self.drop_after:
+                self.drop_after = None
+                return True
+            return False
+
+    def settings(self):
+        return {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': '127.0.0.1',
+            'EMAIL_PORT': self.port,
+            'EMAIL_HOST_USER': '',
+            'EMAIL_HOST_PASSWORD': '',
+            'EMAIL_USE_TLS': False,
+            'EMAIL_USE_SSL': False,
+        }
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
@@ -1,42 +1,412 @@
-from celery import shared_task
-from django.core.mail import send_mail
+from celery import current_app, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
 from django.conf import settings
-from apps.courses.models.enrollment import Enrollment
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from apps.auth.models import User, Role
+from apps.courses.models.enrollment import BulkEnrollmentJob, Enrollment, OutboxEvent, ProgressBackfillJob
+from apps.courses.models.lesson import Lesson
+from functools import lru_cache
 import logging
+import smtplib
+import time
+
+
+@lru_cache(maxsize=None)
+def _email_template(name):
+    # Compiled once per process; the template loaders do not cache while DEBUG is on
+    return get_template(name)
+
+
+def _is_transient(exc):
+    """Whether resending later may succeed: lost connections, network errors and 4xx replies."""
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPException):
+        return isinstance(exc, smtplib.SMTPServerDisconnected)
+    return isinstance(exc, OSError)
+
+
+def _completion_messages(enrollments):
+    subjects = {}
+    for enrollment in enrollments:
+        course, student = enrollment.course, enrollment.student
+        if course.id not in subjects:
+            subjects[course.id] = _email_template('courses/email/course_completed_subject.txt').render(
+                {'course': course}
+            ).strip()
+        body = _email_template('courses/email/course_completed_body.txt').render({'student': student, 'course': course})
+        yield EmailMessage(subjects[course.id], body, settings.DEFAULT_FROM_EMAIL, [student.email])
+
+
+def _retry_notifications(task, exc, remaining, sent, args=None):
+    """
+    Retry `task` for the `remaining` enrollments after a transient failure,
+    backing off exponentially from `NOTIFICATION_EMAIL_RETRY_DELAY`, or give
+    up once it was retried `NOTIFICATION_EMAIL_MAX_RETRIES` times. A task
+    called directly, not run by a worker, leaves that to its caller.
+    """
+    if task.request.called_directly:
+        raise exc
+    if task.request.retries >= settings.NOTIFICATION_EMAIL_MAX_RETRIES:
+        logging.error(f"Gave up on {len(remaining)} completion notification(s): {exc}")
+        return f"{sent} completion notification(s) sent, {len(remaining)} failed"
+    logging.warning(f"Retrying {len(remaining)} completion notification(s) after {sent} sent: {exc}")
+    raise task.retry(
+        args=args or [remaining], exc=exc, max_retries=settings.NOTIFICATION_EMAIL_MAX_RETRIES,
+        countdown=settings.NOTIFICATION_EMAIL_RETRY_DELAY * 2 ** task.request.retries,
+    )
+
+
+@shared_task(bind=True)
+def send_course_completion_notifications(self, enrollment_ids):
+    """
+    Email the students of `enrollment_ids` that their course is completed, all
+    over one SMTP connection. A message rejected for good is logged and
+    skipped. A transient failure retries the task for the messages not sent
+    yet, backing off exponentially from `NOTIFICATION_EMAIL_RETRY_DELAY`, at
+    most `NOTIFICATION_EMAIL_MAX_RETRIES` times.
+    """
+    enrollments = list(Enrollment.objects.filter(id__in=enrollment_ids).select_related('student', 'course').only(
+        'id', 'student__email', 'student__full_name', 'course__title'
+    ).order_by('id'))
+    missing = len(set(enrollment_ids)) - len(enrollments)
+    sent = rejected = done = 0
+    try:
+        with get_connection() as connection:
+            for message in _completion_messages(enrollments):
+                try:
+                    connection.send_messages([message])
+                    sent += 1
+                except smtplib.SMTPException as exc:
+                    if _is_transient(exc):
+                        raise
+                    rejected += 1
+                    logging.warning(f"Completion notification to {message.to[0]} rejected: {exc}")
+                done += 1
+    except Exception as exc:
+        # A batch cut short by its soft time limit is continued like a transient failure
+        if not (_is_transient(exc) or isinstance(exc, SoftTimeLimitExceeded)):
+            raise
+        remaining = [enrollment.id for enrollment in enrollments[done:]]
+        return _retry_notifications(self, exc, remaining, sent)
+    
+    logging.info(f"Sent {sent} completion notification(s) over one connection")
+    result = f"{sent} completion notification(s) sent"
+    if rejected:
+        result += f", {rejected} rejected"
+    if missing:
+        result += f", {missing} enrollment(s) not found"
+    return result
+
+
+@shared_task(bind=True)
+def send_course_completion_notification(self, enrollment_id):
+    """
+    Single-enrollment form, kept for messages queued before notifications were
+    batched, with the same retries.
+    """
+    try:
+        return send_course_completion_notifications([enrollment_id])
+    except Exception as exc:
+        if not (_is_transient(exc) or isinstance(exc, SoftTimeLimitExceeded)):
+            raise
+        return _retry_notifications(self, exc, [enrollment_id], 0, args=[enrollment_id])
+
+
+
+# Task published for each outbox event type, with the enrollment ids of a batch
+OUTBOX_TASKS = {
+    OutboxEvent.COURSE_COMPLETED: send_course_completion_notifications,
+}
+
+
+def _relay_batch(batch_size):
+    """
+    Publish the oldest unpublished outbox events, one task per event type
+    with the enrollment ids of the batch, through one pooled producer and
+    mark them published in the same transaction. Rows are claimed with
+    SKIP LOCKED, so relays may overlap. Delivery is at least once: a crash
+    between publishing and the commit publishes the batch again.
+    Returns the number of events published and the publishing error, if any.
+    """
+    with transaction.atomic():
+        events = list(OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+            published_at__isnull=True
+        ).order_by('id').only('event_type', 'enrollment_id')[:batch_size])
+        batches = {}
+        for event in events:
+            batches.setdefault(event.event_type, []).append(event)
+        published, error = [], None
+        try:
+            with current_app.producer_or_acquire() as producer:
+                for event_type, batch in batches.items():
+                    OUTBOX_TASKS[event_type].apply_async(
+                        args=[[event.enrollment_id for event in batch]], producer=producer
+                    )
+                    published.extend(event.pk for event in batch)
+        except Exception as exc:
+            # Keep what went out; the rest stays pending for the next run
+            error = exc
+        OutboxEvent.objects.filter(pk__in=published).update(published_at=timezone.now())
+    return len(published), error
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Relay outbox events in batches of `OUTBOX_RELAY_BATCH_SIZE` until none
+    are left (or `max_batches` ran) and record the run for `outbox_stats()`.
+    Returns the number of events published.
+    """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    started = time.perf_counter()
+    published = batches = 0
+    error = None
+    while max_batches is None or batches < max_batches:
+        count, error = _relay_batch(batch_size)
+        published += count
+        batches += 1
+        if error is not None or count < batch_size:
+            break
+    elapsed = time.perf_counter() - started
+    
+    if published:
+        try:
+            cache.incr('outbox:stats:published', published)
+        except ValueError:
+            if not cache.add('outbox:stats:published', published, None):
+                cache.incr('outbox:stats:published', published)
+    cache.set('outbox:stats:last_run', {
+        'published': published,
+        'seconds': round(elapsed, 3),
+        'events_per_second': round(published / elapsed, 1) if elapsed > 0 else 0.0,
+        'finished_at': timezone.now().isoformat(),
+    }, None)
+    if error is not None:
+        logging.error(f"Outbox relay stopped after {published} event(s): {error}")
+        raise error
+    if published:
+        logging.info(f"Outbox relay published {published} event(s) at {published / elapsed:,.0f} events/s")
+    return published
+
+
+def outbox_stats():
+    """Backlog, lag (age of the oldest unpublished event) and relay throughput."""
+    pending = OutboxEvent.objects.filter(published_at__isnull=True)
+    oldest = pending.order_by('id').values_list('created_at', flat=True).first()
+    return {
+        'pending': pending.count(),
+        'lag_seconds': round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0,
+        'published': cache.get('outbox:stats:published', 0),
+        'last_run': cache.get('outbox:stats:last_run'),
+    }
 
 
 @shared_task
-def send_course_completion_notification(enrollment_id):
+def relay_outbox():
+    """Run by Celery beat every `OUTBOX_RELAY_INTERVAL` seconds."""
+    published = drain_outbox()
+    return f"Outbox relay: {published} event(s) published"
+
+
+def _enroll_chunk(job, chunk):
+    """
+    Enroll one chunk of students: a single query resolves and role-checks the
+    identifiers (ids are ints, emails lower-cased strings matched regardless of
+    the case they were stored in), a second finds existing
+    enrollments, and the rest are inserted with
+    `bulk_create(ignore_conflicts=True)`. Progress rows are sparse, so nothing
+    else has to be written.
+    """
+    ids = [identifier for identifier in chunk if isinstance(identifier, int)]
+    emails = [identifier for identifier in chunk if not isinstance(identifier, int)]
+    students = {}
+    for user_id, email in User.objects.annotate(email_lower=Lower('email')).filter(
+        Q(id__in=ids) | Q(email_lower__in=emails), role=Role.STUDENT
+    ).values_list('id', 'email_lower'):
+        students[user_id] = user_id
+        students[email] = user_id
+    
+    invalid = [identifier for identifier in chunk if identifier not in students]
+    student_ids = set(students.values())
+    existing = set(Enrollment.objects.filter(
+        course_id=job.course_id, student_id__in=student_ids
+    ).values_list('student_id', flat=True))
+    new_ids = sorted(student_ids - existing)
+    
+    Enrollment.objects.bulk_create(
+        [Enrollment(student_id=student_id, course_id=job.course_id) for student_id in new_ids],
+        ignore_conflicts=True,
+    )
+    return len(new_ids), len(existing), invalid
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def process_bulk_enrollment(self, job_id):
     try:
-        enrollment = Enrollment.objects.select_related('student', 'course').get(id=enrollment_id)
-        student = enrollment.student
-        course = enrollment.course
-        
-        subject = f'Congratulations! You completed {course.title}'
-        message = f"""
-        Dear {student.full_name},
-        
-        Congratulations! You have successfully completed the course "{course.title}".
-        
-        We hope you enjoyed the course and learned valuable skills.
-        
-        Best regards,
-        Course Platform Team
-        """
-        
-       
-        logging.info(f"Sending completion notification to {student.email} for course {course.title}")
+        job = BulkEnrollmentJob.objects.get(id=job_id)
+    except BulkEnrollmentJob.DoesNotExist:
+        return f"Bulk enrollment job {job_id} not found"
+    if job.status in ('completed', 'failed'):
+        return f"Bulk enrollment job {job_id} already {job.status}"
+    
+    if job.started_at is None:
+        job.started_at = timezone.now()
+    job.status = 'running'
+    job.save(update_fields=['status', 'started_at', 'updated_at'])
+    
+    chunk_size = settings.BULK_ENROLLMENT_CHUNK_SIZE
+    try:
+        while job.processed < job.total:
+            chunk = job.students[job.processed:job.processed + chunk_size]
+            with transaction.atomic():
+                enrolled, existing, invalid = _enroll_chunk(job, chunk)
+                job.processed += len(chunk)
+                job.enrolled += enrolled
+                job.already_enrolled += existing
+                job.invalid += len(invalid)
+                room = BulkEnrollmentJob.MAX_ERRORS - len(job.errors)
+                job.errors.extend({'student': identifier, 'error': 'No student with this id or email'} for identifier in invalid[:max(room, 0)])
+                job.save(update_fields=['processed', 'enrolled', 'already_enrolled', 'invalid', 'errors', 'updated_at'])
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc)
+        logging.exception(f"Bulk enrollment job {job_id} failed")
+        job.status = 'failed'
+        job.errors.append({'error': str(exc)})
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'errors', 'finished_at', 'updated_at'])
+        return f"Bulk enrollment job {job_id} failed"
+    
+    job.status = 'completed'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return f"Bulk enrollment job {job_id}: {job.enrolled} enrolled, {job.already_enrolled} already enrolled, {job.invalid} invalid"
+
+
+def schedule_progress_backfill(course_id, move=None, using=None):
+    """
+    Record a lesson change of a course that has enrollments and queue its
+    backfill once the surrounding transaction commits. Changes made before the
+    pending job has started are coalesced into it.
+    """
+    if not Enrollment.objects.using(using).filter(course_id=course_id).exists():
+        return None
+    with transaction.atomic(using=using):
+        job = ProgressBackfillJob.objects.using(using).select_for_update().filter(
+            course_id=course_id, status='pending', last_enrollment_id=0
+        ).order_by('-id').first()
+        if job is None:
+            job = ProgressBackfillJob.objects.using(using).create(course_id=course_id)
+        if move is not None:
+            job.moves.append(list(move))
+            job.save(update_fields=['moves', 'updated_at'])
+    transaction.on_commit(lambda: process_progress_backfill.delay(course_id), using=using)
+    return job
+
+
+def _backfill_chunk(job, orders, chunk_size):
+    """
+    Apply the job to the next chunk of enrollments, locked only for this
+    chunk's transaction; `lesson_progress` is not touched at all. Returns the
+    number of enrollments read.
+    """
+    enrollments = list(Enrollment.objects.select_for_update().filter(
+        course_id=job.course_id, pk__gt=job.last_enrollment_id
+    ).order_by('pk').only(
+        'course_id', 'completion_bits', 'completion_times', 'completed_lessons', 'frontier_order', 'completed_at'
+    )[:chunk_size])
+    
+    changed, completed = [], []
+    now = timezone.now()
+    for enrollment in enrollments:
+        bits, times = enrollment.completion, dict(enrollment.completion_times)
+        for old_order, new_order in job.moves:
+            done = bits.is_done(old_order)
+            completed_at = times.pop(str(old_order), None)
+            bits.move(old_order, new_order)
+            if done and new_order is not None and completed_at is not None:
+                times[str(new_order)] = completed_at
+        frontier = bits.first_incomplete(orders)
+        completed_at = enrollment.completed_at
+        if frontier is None and orders:
+            if completed_at is None:
+                completed_at = now
+                completed.append(enrollment.pk)
+        else:
+            completed_at = None
         
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[student.email],
-            fail_silently=False,
+        new_state = (bits.to_bytes(), times, bits.popcount(), frontier, completed_at)
+        old_state = (
+            bytes(enrollment.completion_bits), enrollment.completion_times, enrollment.completed_lessons,
+            enrollment.frontier_order, enrollment.completed_at,
         )
+        if new_state != old_state:
+            (enrollment.completion_bits, enrollment.completion_times, enrollment.completed_lessons,
+             enrollment.frontier_order, enrollment.completed_at) = new_state
+            enrollment.updated_at = now
+            changed.append(enrollment)
+    
+    Enrollment.objects.bulk_update(
+        changed,
+        ['completion_bits', 'completion_times', 'completed_lessons', 'frontier_order', 'completed_at', 'updated_at'],
+    )
+    OutboxEvent.objects.enqueue(OutboxEvent.COURSE_COMPLETED, completed)
+    if enrollments:
+        job.last_enrollment_id = enrollments[-1].pk
+        job.processed += len(enrollments)
+        job.updated += len(changed)
+    return len(enrollments)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def process_progress_backfill(self, course_id):
+    """
+    Run the course's unfinished backfill jobs, oldest first. Each chunk locks
+    the job row and re-reads its cursor, so duplicate deliveries of this task
+    take turns instead of applying a chunk twice.
+    """
+    chunk_size = settings.PROGRESS_BACKFILL_CHUNK_SIZE
+    done = []
+    while True:
+        job = ProgressBackfillJob.objects.filter(course_id=course_id, status__in=['pending', 'running']).first()
+        if job is None:
+            return f"Progress backfill for course {course_id}: {len(done)} job(s) completed"
         
-        return f"Notification sent to {student.email} for course completion"
-    except Enrollment.DoesNotExist:
-        return f"Enrollment with id {enrollment_id} not found"
-    except Exception as e:
-        return f"Error sending notification: {str(e)}"
+        try:
+            while True:
+                with transaction.atomic():
+                    job = ProgressBackfillJob.objects.select_for_update().get(pk=job.pk)
+                    if job.status not in ('pending', 'running'):
+                        break
+                    if job.status == 'pending':
+                        job.status = 'running'
+                        job.started_at = timezone.now()
+                    orders = list(Lesson.objects.filter(course_id=course_id).order_by('order').values_list('order', flat=True))
+                    if not _backfill_chunk(job, orders, chunk_size):
+                        job.status = 'completed'
+                        job.finished_at = timezone.now()
+                    job.save()
+                if job.status == 'completed':
+                    logging.info(
+                        f"Progress backfill job {job.id}: {job.processed} enrollments ({job.updated} updated) "
+                        f"at {job.throughput:,.0f} enrollments/s"
+                    )
+                    done.append(job.id)
+                    break
+        except Exception as exc:
+            if self.request.retries < self.max_retries:
+                raise self.retry(exc=exc)
+            logging.exception(f"Progress backfill job {job.id} failed")
+            ProgressBackfillJob.objects.filter(pk=job.pk).update(
+                status='failed', error=str(exc), finished_at=timezone.now(), updated_at=timezone.now()
+            )
+            return f"Progress backfill job {job.id} failed"
+
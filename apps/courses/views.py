@@ -1,32 +1,74 @@
-from rest_framework import viewsets, status
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Prefetch, Subquery
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
 from apps.courses.models.course import Course
-from apps.courses.models.lesson import Lesson, LessonProgress
-from apps.courses.models.enrollment import Enrollment
+from apps.courses.models.lesson import Lesson, LessonContent, LessonProgress
+from apps.courses.models.enrollment import BulkEnrollmentJob, Enrollment, OutboxEvent
+from apps.courses.cache import catalog_cache
+from apps.courses.content import GZIP, IDENTITY, iter_content
+from apps.courses.search import FullTextSearchFilter, search_courses, search_lessons
+from apps.courses.tasks import outbox_stats, process_bulk_enrollment
 from apps.auth.models import Role
 
-from apps.courses.serializers.course import CourseSerializer, CourseCreateSerializer
-from apps.courses.serializers.lesson import LessonSerializer, LessonCreateSerializer, LessonBulkCreateSerializer, LessonProgressSerializer
-from apps.courses.serializers.enrollment import EnrollmentSerializer, EnrollmentProgressSerializer
+from apps.courses.serializers.course import CourseSerializer, CourseListSerializer, CourseCreateSerializer
+from apps.courses.serializers.lesson import (
+    LessonSerializer, LessonCreateSerializer, LessonBulkCreateSerializer, LessonProgressSerializer,
+    LessonCompletionBatchSerializer, LessonCompletionResultSerializer
+)
+from apps.courses.serializers.enrollment import (
+    EnrollmentSerializer, EnrollmentProgressSerializer, EnrollmentDashboardSerializer,
+    BulkEnrollmentSerializer, BulkEnrollmentJobSerializer
+)
 
-from apps.courses.permissions import IsInstructor, IsStudent, IsCourseOwner, IsEnrollmentOwner
+from apps.courses.permissions import (
+    IsInstructor, IsInstructorOrAdmin, IsStudent, IsCourseOwner, IsEnrollmentOwner, IsLessonOwner
+)
+from apps.base.mixins import ConditionalGetMixin, OwnedObjectMixin, SparseQuerysetMixin
+from apps.base.serializers import parse_fieldsets
 
 
-class CourseViewSet(viewsets.ModelViewSet):  
+class CourseViewSet(ConditionalGetMixin, SparseQuerysetMixin, OwnedObjectMixin, viewsets.ModelViewSet):  
     http_method_names = ['get', 'post', 'patch', 'delete']
+    owner_field = 'instructor_id'
+    owner_actions = ('update', 'partial_update', 'destroy', 'publish')
+    not_found_message = "Course not found"
+    cursor_ordering = ('-created_at', '-id')
+    expandable = {'lessons', 'lessons.content'}
+    filter_backends = [FullTextSearchFilter]
+    search_function = staticmethod(search_courses)
     
     def get_serializer_class(self):
         if self.action == 'create':
             return CourseCreateSerializer
+        elif self.action == 'list':
+            return CourseListSerializer
         return CourseSerializer
     
-    def get_queryset(self):
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self._get_expand()
+        return context
+    
+    def _get_expand(self):
+        if not getattr(self, 'request', None):
+            return set()
+        values = self.request.query_params.get('expand', '')
+        return {value.strip() for value in values.split(',') if value.strip() in self.expandable}
+    
+    def _get_scoped_queryset(self):
         user = self.request.user 
         if user.role == Role.INSTRUCTOR:
             return Course.objects.filter(instructor=user)
@@ -34,31 +76,85 @@ class CourseViewSet(viewsets.ModelViewSet):
             return Course.objects.filter(status='published')
         return Course.objects.none()
     
+    def get_owner_lookup_queryset(self):
+        # Courses of other instructors are found and refused with a 403
+        if self.action in ('update', 'partial_update'):
+            return Course.objects.select_related('instructor')
+        return Course.objects.all()
+    
+    def get_queryset(self):
+        queryset = self._get_scoped_queryset()
+        
+        if self.action == 'list':
+            queryset = queryset.annotate(instructor_name=F('instructor__full_name'))
+            expand = self._get_expand()
+            if 'lessons' in expand or 'lessons.content' in expand:
+                queryset = queryset.prefetch_related(self._lessons_prefetch(expand))
+        elif self.action == 'retrieve':
+            queryset = queryset.select_related('instructor').prefetch_related(self._lessons_prefetch(self._get_expand()))
+        return queryset
+    
+    def _lessons_prefetch(self, expand):
+        if 'lessons.content' in expand:
+            return Prefetch('lessons', queryset=Lesson.objects.with_content())
+        return Prefetch('lessons', queryset=Lesson.objects.only('id', 'course_id', 'title', 'order'))
+    
+    def get_validator_querysets(self):
+        queryset = self._get_scoped_queryset()
+        if self.action == 'retrieve':
+            queryset = self.filter_to_lookup(queryset, 'pk')
+        return [queryset, Lesson.objects.filter(course__in=queryset.values('pk'))]
+    
+    def get_validator_scope(self):
+        if self._uses_catalog_cache():
+            return [self.action, Role.STUDENT]
+        return super().get_validator_scope()
+    
+    def get_validators(self):
+        if not self._uses_catalog_cache():
+            return super().get_validators()
+        key = f"{self._catalog_key()}:validators"
+        validators, _ = catalog_cache.get_or_build(key, super().get_validators, track_stats=False)
+        return validators
+    
+    def _uses_catalog_cache(self):
+        # Every student sees the same published catalog, so their responses are shared
+        return self.request.user.role == Role.STUDENT
+    
+    def _catalog_key(self):
+        if self.action == 'retrieve':
+            return catalog_cache.detail_key(self.kwargs[self.lookup_url_kwarg or self.lookup_field], self.request.query_params)
+        return catalog_cache.list_key(self.request.query_params)
+    
+    def _cached_response(self, builder):
+        data, hit = catalog_cache.get_or_build(self._catalog_key(), builder)
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        if not self._uses_catalog_cache():
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(request, lambda: self._cached_response(
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs).data
+        ))
+    
+    def retrieve(self, request, *args, **kwargs):
+        if not self._uses_catalog_cache():
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(request, lambda: self._cached_response(
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs).data
+        ))
+    
     def get_permissions(self):
         if self.action in ['create']:
             return [IsAuthenticated(), IsInstructor()]
-        elif self.action in ['update', 'partial_update', 'destroy']:
+        elif self.action in self.owner_actions:
             return [IsAuthenticated(), IsCourseOwner()]
+        elif self.action == 'cache_stats':
+            return [IsAuthenticated(), IsAdminUser()]
         return [IsAuthenticated()]
     
-    def get_object(self):
-        if self.action in ['update', 'partial_update', 'destroy']:
-            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
-            lookup_value = self.kwargs[lookup_url_kwarg]
-            filter_kwargs = {self.lookup_field: lookup_value}
-            
-            try:
-                obj = Course.objects.get(**filter_kwargs)
-            except Course.DoesNotExist:
-                raise NotFound("Course not found")
-            
-            if obj.instructor != self.request.user:
-                raise PermissionDenied("You can only manage your own courses.")
-            
-            return obj
-        
-        return super().get_object()
-    
     def perform_create(self, serializer):
         course = serializer.save(instructor=self.request.user, status='draft')
         return course
@@ -70,17 +166,6 @@ class CourseViewSet(viewsets.ModelViewSet):
         response_serializer = CourseSerializer(course)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
     
-    def perform_update(self, serializer):
-        course = self.get_object()
-        if course.instructor != self.request.user:
-            raise PermissionDenied("You do not have permission to update this course. You can only update your own courses.")
-        serializer.save()
-    
-    def perform_destroy(self, instance):
-        if instance.instructor != self.request.user:
-            raise PermissionDenied("You do not have permission to delete this course. You can only delete your own courses.")
-        instance.delete()
-    
     @extend_schema(
         operation_id='course_publish',
         summary='Publish a draft course',
@@ -92,24 +177,45 @@ class CourseViewSet(viewsets.ModelViewSet):
     def publish(self, request, pk=None):
         course = self.get_object()
         
-        if course.instructor != request.user:
-            raise PermissionDenied("You do not have permission to publish this course. You can only publish your own courses.")
-        
         if course.status != 'draft':
             raise ValidationError({"status": "Only draft courses can be published."})
         
         course.status = 'published'
-        course.save()
+        course.save(update_fields=['status', 'updated_at'])
         return Response({'status': 'Course published successfully'}, status=status.HTTP_200_OK)
+    
+    @extend_schema(
+        operation_id='course_cache_stats',
+        summary='Catalog cache statistics',
+        description='Hit and miss counters of the student catalog response cache.',
+        request=None,
+        responses=OpenApiResponse(description='Cache hit/miss counters')
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def cache_stats(self, request):
+        return Response(catalog_cache.stats(), status=status.HTTP_200_OK)
 
 
 
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(ConditionalGetMixin, SparseQuerysetMixin, OwnedObjectMixin, viewsets.ModelViewSet):
     serializer_class = LessonSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
+    owner_field = 'course__instructor_id'
+    not_found_message = "Lesson not found"
+    cursor_ordering = ('course', 'order', 'id')
+    filter_backends = [FullTextSearchFilter]
+    search_function = staticmethod(search_lessons)
     
     def get_queryset(self):
+        queryset = self._get_scoped_queryset()
+        if self.action in ('list', 'retrieve'):
+            fields, omit = parse_fieldsets(self.request)
+            if (fields is None or 'content' in fields) and 'content' not in omit:
+                queryset = queryset.with_content()
+        return queryset
+    
+    def _get_scoped_queryset(self):
         user = self.request.user
         course_id = self.request.query_params.get('course', None)
         
@@ -127,6 +233,10 @@ class LessonViewSet(viewsets.ModelViewSet):
             return queryset
         return Lesson.objects.none()
     
+    def get_owner_lookup_queryset(self):
+        # Lessons of other instructors' courses are found and refused with a 403
+        return Lesson.objects.all()
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return LessonCreateSerializer
@@ -135,36 +245,20 @@ class LessonViewSet(viewsets.ModelViewSet):
         return LessonSerializer
     
     def get_permissions(self):
-        if self.action in ['create', 'bulk_create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['update', 'partial_update', 'destroy']:
+            return [IsAuthenticated(), IsInstructor(), IsLessonOwner()]
+        if self.action in ['create', 'bulk_create']:
             return [IsAuthenticated(), IsInstructor()]
         return [IsAuthenticated()]
     
     def perform_create(self, serializer):
-        course_id = self.request.data.get('course')
-        if not course_id:
-            raise ValidationError({"course": "Course ID is required"})
-        
-        try:
-            course = Course.objects.get(id=course_id)
-        except Course.DoesNotExist:
-            raise NotFound("Course not found")
-        
-        if course.instructor != self.request.user:
+        # The serializer has already resolved the course
+        course = serializer.validated_data['course']
+        if course.instructor_id != self.request.user.id:
             raise PermissionDenied("You can only add lessons to your own courses")
         
         serializer.save(course=course)
     
-    def perform_update(self, serializer):
-        lesson = self.get_object()
-        if lesson.course.instructor != self.request.user:
-            raise PermissionDenied("You do not have permission to update this lesson. You can only update lessons in your own courses.")
-        serializer.save()
-    
-    def perform_destroy(self, instance):
-        if instance.course.instructor != self.request.user:
-            raise PermissionDenied("You do not have permission to delete this lesson. You can only delete lessons from your own courses.")
-        instance.delete()
-    
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsInstructor])
     def bulk_create(self, request):
         """
@@ -185,128 +279,256 @@ class LessonViewSet(viewsets.ModelViewSet):
         
         response_serializer = LessonSerializer(lessons, many=True)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(
+        operation_id='lesson_content',
+        summary='Stream a lesson body',
+        description='Stream the current revision of a lesson body as plain text. Bodies stored gzip-compressed '
+                    'are sent as-is to clients accepting gzip.',
+        request=None,
+        responses={(200, 'text/plain'): OpenApiTypes.STR}
+    )
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        lesson = self.get_object()
+        stored = LessonContent.objects.filter(lesson=lesson, revision=lesson.content_revision).first()
+        if stored is None:
+            raise NotFound("Lesson content not found")
+        
+        passthrough = stored.encoding == GZIP and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        etag = quote_etag(f"{lesson.pk}-{stored.revision}{'-gzip' if passthrough else ''}")
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            encoding = IDENTITY if passthrough else stored.encoding
+            response = StreamingHttpResponse(iter_content(encoding, stored.data), content_type='text/plain; charset=utf-8')
+            if passthrough:
+                response['Content-Encoding'] = GZIP
+                response['Content-Length'] = len(stored.data)
+            else:
+                response['Content-Length'] = stored.size
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept-Encoding', 'Authorization'])
+        return response
 
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
     http_method_names = ['get', 'post']
+    cursor_ordering = ('-enrolled_at', '-id')
+    owner_field = 'student_id'
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return EnrollmentProgressSerializer
+        elif self.action == 'dashboard':
+            return EnrollmentDashboardSerializer
+        elif self.action == 'bulk':
+            return BulkEnrollmentSerializer
+        elif self.action == 'bulk_status':
+            return BulkEnrollmentJobSerializer
         return EnrollmentSerializer
     
     def get_queryset(self):
-        return Enrollment.objects.filter(student=self.request.user)
+        queryset = Enrollment.objects.filter(student=self.request.user)
+        if self.action == 'retrieve':
+            # Progress counters live on the enrollment and its course, so this is the only query
+            queryset = queryset.select_related('course')
+        return queryset
     
     def get_permissions(self):
-        if self.action == 'create':
+        if self.action in ['create', 'dashboard']:
             return [IsAuthenticated(), IsStudent()]
+        elif self.action in ['bulk', 'bulk_status']:
+            return [IsAuthenticated(), IsInstructorOrAdmin()]
         return [IsAuthenticated(), IsStudent(), IsEnrollmentOwner()]
     
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        
-        total_lessons = instance.course.lessons.count()
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=instance,
-            completed=True
-        ).count()
-        completion_percentage = round((completed_lessons / total_lessons * 100) if total_lessons > 0 else 0.0, 2)
-        
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        data['total_lessons'] = total_lessons
-        data['completed_lessons'] = completed_lessons
-        data['completion_percentage'] = completion_percentage
-        
-        return Response(data, status=status.HTTP_200_OK)
+    def get_validator_querysets(self):
+        if self.action != 'retrieve':
+            return super().get_validator_querysets()
+        enrollments = self.filter_to_lookup(Enrollment.objects.filter(student=self.request.user), 'pk')
+        # Counter updates touch `updated_at` on the enrollment and the course
+        return [enrollments, Course.objects.filter(enrollments__in=enrollments.values('pk'))]
     
     def perform_create(self, serializer):
         course_id = self.request.data.get('course')
         if not course_id:
             raise ValidationError({"course": "Course ID is required"})
         
-        try:
-            course = Course.objects.get(id=course_id)
-        except Course.DoesNotExist:
-            raise NotFound("Course not found")
+        # The serializer has already resolved the course
+        course = serializer.validated_data['course']
         
         if course.status != 'published':
             raise ValidationError({"course": "Only published courses can be enrolled in"})
         
-        if course.instructor == self.request.user:
+        if course.instructor_id == self.request.user.id:
             raise ValidationError({"course": "Instructors may not enroll in their own courses"})
         
-        if Enrollment.objects.filter(student=self.request.user, course=course).exists():
+        # Progress rows are only written once a lesson is completed, so enrolling is a single INSERT
+        enrollment = Enrollment.objects.enroll(self.request.user, course)
+        if enrollment is None:
             raise ValidationError({"course": "You are already enrolled in this course"})
-        
-        enrollment = serializer.save(student=self.request.user, course=course)
-        
-        lessons = course.lessons.all()
-        for lesson in lessons:
-            LessonProgress.objects.create(
-                enrollment=enrollment,
-                lesson=lesson,
-                completed=False
-            )
+        serializer.instance = enrollment
+    
+    @extend_schema(
+        operation_id='enrollment_dashboard',
+        summary='Student dashboard',
+        description='Every enrollment of the student with course title, lesson counts, completion percentage and '
+                    'the next lesson to study, newest first. Served by a single query however many courses the '
+                    'student is enrolled in.',
+        request=None,
+        responses={200: EnrollmentDashboardSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        # Counters and the frontier live on the rows, so only the next lesson is looked up, by (course, order)
+        next_lessons = Lesson.objects.filter(course_id=OuterRef('course_id'), order=OuterRef('frontier_order'))
+        enrollments = Enrollment.objects.filter(student=request.user).select_related('course').only(
+            'id', 'course_id', 'enrolled_at', 'completed_at', 'completed_lessons', 'frontier_order',
+            'course__title', 'course__lesson_count',
+        ).annotate(
+            next_lesson_id=Subquery(next_lessons.values('id')[:1]),
+            next_lesson_title=Subquery(next_lessons.values('title')[:1]),
+        ).order_by('-enrolled_at', '-id')
+        return Response(self.get_serializer(enrollments, many=True).data, status=status.HTTP_200_OK)
+    
+    @extend_schema(
+        operation_id='enrollment_bulk_create',
+        summary='Enroll many students into a course',
+        description='Queue a bulk enrollment job (instructors for their own courses, or admins). Send '
+                    '{"course": <id>, "students": [<email or id>, ...]} as JSON, or `course` and a CSV `file` '
+                    'as multipart form data. Poll the returned job for progress.',
+        request=BulkEnrollmentSerializer,
+        responses={202: BulkEnrollmentJobSerializer}
+    )
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save()
+        transaction.on_commit(lambda: process_bulk_enrollment.delay(job.id))
+        return Response(BulkEnrollmentJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @extend_schema(
+        operation_id='enrollment_bulk_status',
+        summary='Bulk enrollment job status',
+        description='Status and progress counters of a bulk enrollment job started by the caller.',
+        request=None,
+        responses={200: BulkEnrollmentJobSerializer}
+    )
+    @action(detail=False, methods=['get'], url_path=r'bulk/(?P<job_id>[0-9]+)')
+    def bulk_status(self, request, job_id=None):
+        jobs = BulkEnrollmentJob.objects.defer('students')
+        if not request.user.is_staff:
+            jobs = jobs.filter(requested_by=request.user)
+        job = jobs.filter(id=job_id).first()
+        if job is None:
+            raise NotFound("Bulk enrollment job not found")
+        return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)
 
 
 
 
-class LessonProgressViewSet(viewsets.ModelViewSet):
+class LessonProgressViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
+    """
+    Progress rows only exist for lessons a student has completed (and not at
+    all with `LESSON_PROGRESS_STORE = "bitset"`). The list covers every lesson
+    of the student's enrolled courses and reads completion from the bitset on
+    each enrollment, so entries without a row have a null `id`.
+    """
     serializer_class = LessonProgressSerializer
     permission_classes = [IsAuthenticated, IsStudent, IsEnrollmentOwner]
+    cursor_ordering = ('course_id', 'order', 'id')
+    owner_field = 'enrollment__student_id'
     
     def get_queryset(self):
-        return LessonProgress.objects.filter(enrollment__student=self.request.user)
+        # Other students' progress is not found at all
+        queryset = LessonProgress.objects.filter(enrollment__student_id=self.request.user.id)
+        if self.action in ('retrieve', 'update', 'partial_update', 'destroy', 'complete'):
+            queryset = queryset.select_related('enrollment', 'lesson')
+        return queryset
+    
+    def _get_enrolled_lessons(self):
+        lessons = Lesson.objects.filter(course__enrollments__student=self.request.user).annotate(
+            enrollment_id=F('course__enrollments__id')
+        ).only('id', 'course_id', 'title', 'order').order_by('course_id', 'order', 'id')
+        enrollment_id = self.request.query_params.get('enrollment')
+        if enrollment_id:
+            lessons = lessons.filter(course__enrollments__id=enrollment_id)
+        lesson_id = self.request.query_params.get('lesson')
+        if lesson_id:
+            lessons = lessons.filter(id=lesson_id)
+        return lessons
+    
+    def _with_progress(self, lessons):
+        enrollments = Enrollment.objects.only('completion_bits', 'completion_times').in_bulk(
+            {lesson.enrollment_id for lesson in lessons}
+        )
+        progresses = {}
+        if settings.LESSON_PROGRESS_STORE == 'rows' and lessons:
+            progresses = {
+                progress.lesson_id: progress
+                for progress in self.get_queryset().filter(lesson__in=[lesson.id for lesson in lessons])
+            }
+        entries = []
+        for lesson in lessons:
+            enrollment = enrollments[lesson.enrollment_id]
+            progress = progresses.get(lesson.id)
+            if progress is None:
+                done = enrollment.completion.is_done(lesson.order)
+                progress = LessonProgress(
+                    enrollment_id=lesson.enrollment_id,
+                    completed=done,
+                    completed_at=enrollment.lesson_completed_at(lesson.order) if done else None,
+                )
+            progress.lesson = lesson
+            entries.append(progress)
+        return entries
+    
+    def list(self, request, *args, **kwargs):
+        lessons = self._get_enrolled_lessons()
+        page = self.paginate_queryset(lessons)
+        if page is not None:
+            serializer = self.get_serializer(self._with_progress(page), many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(self._with_progress(list(lessons)), many=True)
+        return Response(serializer.data)
     
     def _validate_sequential_completion(self, enrollment, lesson):
-        all_lessons = enrollment.course.lessons.all().order_by('order')
-        current_order = lesson.order
-        
-        previous_lessons = all_lessons.filter(order__lt=current_order)
-        
-        if previous_lessons.exists():
-            completed_lesson_ids = LessonProgress.objects.filter(
-                enrollment=enrollment,
-                completed=True
-            ).values_list('lesson_id', flat=True)
-            
-            incomplete_previous = previous_lessons.exclude(id__in=completed_lesson_ids)
-            
-            if incomplete_previous.exists():
-                incomplete_lesson = incomplete_previous.first()
+        # Every lesson before the frontier is completed, so anything past it is blocked
+        frontier = enrollment.frontier_order
+        if frontier is not None and lesson.order > frontier:
+            # Orders removed since the frontier was set are skipped
+            blocking = Lesson.objects.filter(
+                course_id=enrollment.course_id, order__gte=frontier
+            ).order_by('order').values_list('order', 'title').first()
+            if blocking is not None and lesson.order > blocking[0]:
                 raise ValidationError({
-                    "lesson": f"You must complete lesson {incomplete_lesson.order} ({incomplete_lesson.title}) before completing this lesson."
+                    "lesson": f"You must complete lesson {blocking[0]} ({blocking[1]}) before completing this lesson."
                 })
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         
-        if instance.enrollment.student != request.user:
-            raise PermissionDenied("You can only update your own progress")
-        
         if 'lesson' in request.data:
             lesson_id = request.data.get('lesson')
-            if lesson_id != instance.lesson.id:
-                try:
-                    lesson = Lesson.objects.get(id=lesson_id)
-                    if lesson.course != instance.enrollment.course:
-                        raise ValidationError({"lesson": "Lesson does not belong to the enrolled course"})
-                except Lesson.DoesNotExist:
+            if lesson_id != instance.lesson_id:
+                course_id = Lesson.objects.filter(id=lesson_id).values_list('course_id', flat=True).first()
+                if course_id is None:
                     raise NotFound("Lesson not found")
+                if course_id != instance.enrollment.course_id:
+                    raise ValidationError({"lesson": "Lesson does not belong to the enrolled course"})
         
         if request.data.get('completed') and not instance.completed:
             self._validate_sequential_completion(instance.enrollment, instance.lesson)
         
-        response = super().update(request, *args, **kwargs)
-        
-        progress = self.get_object()
-        if progress.completed:
-            self._check_course_completion(progress.enrollment)
+        serializer = self.get_serializer(instance, data=request.data, partial=kwargs.get('partial', False))
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_update(serializer)
+            if instance.completed:
+                self._check_course_completion(instance.enrollment)
         
-        return response
+        return Response(serializer.data)
     
     @extend_schema(
         request=None,
@@ -323,9 +545,6 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
     def complete(self, request, pk=None):
         progress = self.get_object()
         
-        if progress.enrollment.student != request.user:
-            raise PermissionDenied("You can only update your own progress")
-        
         if progress.completed:
             return Response(
                 {'message': 'Lesson is already completed'},
@@ -334,16 +553,157 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
         
         self._validate_sequential_completion(progress.enrollment, progress.lesson)
         
-        progress.completed = True
-        progress.completed_at = timezone.now()
-        progress.save()
+        with transaction.atomic():
+            progress.completed = True
+            progress.completed_at = timezone.now()
+            progress.save()
+            
+            # Check if course is completed
+            self._check_course_completion(progress.enrollment)
         
-        # Check if course is completed
-        self._check_course_completion(progress.enrollment)
+        serializer = self.get_serializer(progress)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    @extend_schema(
+        request=None,
+        operation_id='lesson_progress_complete_lesson',
+        summary='Mark a lesson as completed by lesson ID',
+        description='Mark a lesson of an enrolled course as completed. Works for lessons that have not been '
+                    'started yet, which have no progress record. Request body: {"lesson": <lesson id>}.',
+        responses={
+            200: LessonProgressSerializer,
+            400: OpenApiResponse(description='Bad Request - Invalid lesson ID or previous lessons are not completed'),
+            404: OpenApiResponse(description='Not Found - Not enrolled in the course of this lesson')
+        }
+    )
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsStudent])
+    def complete_lesson(self, request):
+        lesson_id = request.data.get('lesson')
+        if lesson_id in (None, ''):
+            raise ValidationError({"lesson": "Lesson ID is required"})
+        try:
+            lesson_id = serializers.IntegerField(min_value=1).run_validation(lesson_id)
+        except ValidationError as exc:
+            raise ValidationError({"lesson": exc.detail})
+        
+        lesson = Lesson.objects.filter(id=lesson_id, course__enrollments__student=request.user).annotate(
+            enrollment_id=F('course__enrollments__id')
+        ).only('id', 'course_id', 'title', 'order').first()
+        if lesson is None:
+            raise NotFound("Lesson not found")
+        
+        with transaction.atomic():
+            # Checked on the locked row, so a concurrent completion is seen before recording this one
+            enrollment = Enrollment.objects.select_for_update().get(pk=lesson.enrollment_id)
+            if enrollment.completion.is_done(lesson.order):
+                return Response(
+                    {'message': 'Lesson is already completed'},
+                    status=status.HTTP_200_OK
+                )
+            
+            self._validate_sequential_completion(enrollment, lesson)
+            
+            if settings.LESSON_PROGRESS_STORE == 'rows':
+                progress, _ = LessonProgress.objects.update_or_create(
+                    enrollment=enrollment,
+                    lesson=lesson,
+                    defaults={'completed': True, 'completed_at': timezone.now()}
+                )
+            else:
+                progress = LessonProgress(enrollment=enrollment, lesson=lesson, completed=True, completed_at=timezone.now())
+                Enrollment.record_completion(enrollment.id, lesson.order, True, progress.completed_at)
+            
+            self._check_course_completion(enrollment)
         
         serializer = self.get_serializer(progress)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+    @extend_schema(
+        operation_id='lesson_progress_batch_complete',
+        summary='Mark many lessons as completed',
+        description='Replay completions queued by a client, e.g. while offline, in one request. Each item gives a '
+                    '`progress` or a `lesson` ID and optionally the client\'s `completed_at` (future times are '
+                    'clamped to now). Items are applied per enrollment in lesson order, so a run of consecutive '
+                    'lessons can be sent in any order; the response has one result per item, in request order.',
+        request=LessonCompletionBatchSerializer,
+        responses={200: LessonCompletionResultSerializer(many=True)}
+    )
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsStudent])
+    def batch_complete(self, request):
+        serializer = LessonCompletionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+        now = timezone.now()
+        
+        progress_ids = [item['progress'] for item in items if 'progress' in item]
+        progress_lessons = dict(self.get_queryset().filter(id__in=progress_ids).values_list('id', 'lesson_id'))
+        lesson_ids = [item['lesson'] if 'lesson' in item else progress_lessons.get(item['progress']) for item in items]
+        lessons = Lesson.objects.filter(course__enrollments__student=request.user).annotate(
+            enrollment_id=F('course__enrollments__id')
+        ).only('id', 'course_id', 'order').in_bulk({lesson_id for lesson_id in lesson_ids if lesson_id})
+        
+        results, pending = [], []
+        for index, lesson_id in enumerate(lesson_ids):
+            results.append({'index': index, 'lesson': lesson_id, 'status': 'not_found', 'completed_at': None})
+            if lesson_id in lessons:
+                pending.append((index, lessons[lesson_id], min(items[index].get('completed_at', now), now)))
+        pending.sort(key=lambda entry: (entry[1].enrollment_id, entry[1].order, entry[0]))
+        
+        with transaction.atomic():
+            # Course completion is evaluated once per enrollment
+            outcomes, _ = Enrollment.record_completions(
+                [(lesson.enrollment_id, lesson.order, completed_at) for _, lesson, completed_at in pending]
+            )
+            completed = [entry for entry, outcome in zip(pending, outcomes) if outcome == 'completed']
+            if settings.LESSON_PROGRESS_STORE == 'rows':
+                self._store_completed_rows(completed)
+        
+        for (index, _, completed_at), outcome in zip(pending, outcomes):
+            results[index]['status'] = outcome
+            if outcome == 'completed':
+                results[index]['completed_at'] = completed_at
+        errors = {
+            'blocked': "You must complete the previous lessons before completing this lesson.",
+            'not_found': "Lesson not found",
+        }
+        for result in results:
+            if result['status'] in errors:
+                result['error'] = errors[result['status']]
+        
+        return Response(LessonCompletionResultSerializer(results, many=True).data, status=status.HTTP_200_OK)
+    
+    def _store_completed_rows(self, completed):
+        # The bitsets are already up to date, so rows are written without LessonProgress.save()
+        existing = {
+            progress.lesson_id: progress
+            for progress in self.get_queryset().filter(lesson_id__in=[lesson.id for _, lesson, _ in completed])
+        }
+        now = timezone.now()
+        updated, created = [], []
+        for _, lesson, completed_at in completed:
+            progress = existing.get(lesson.id)
+            if progress is None:
+                created.append(LessonProgress(
+                    enrollment_id=lesson.enrollment_id, lesson_id=lesson.id, completed=True, completed_at=completed_at
+                ))
+            else:
+                progress.completed, progress.completed_at, progress.updated_at = True, completed_at, now
+                updated.append(progress)
+        LessonProgress.objects.bulk_update(updated, ['completed', 'completed_at', 'updated_at'])
+        LessonProgress.objects.bulk_create(created)
+    
+    @extend_schema(
+        operation_id='lesson_progress_outbox_stats',
+        summary='Outbox relay statistics',
+        description='Unpublished completion events, the age of the oldest one (`lag_seconds`), the number of '
+                    'events published so far and the duration and throughput of the last relay run.',
+        request=None,
+        responses=OpenApiResponse(description='Outbox backlog and relay counters')
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def outbox_stats(self, request):
+        return Response(outbox_stats(), status=status.HTTP_200_OK)
+    
 
     @extend_schema(
         request=None,
@@ -356,18 +716,21 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsStudent])
     def _check_course_completion(self, enrollment):
-        total_lessons = enrollment.course.lessons.count()
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            completed=True
-        ).count()
-        
-        if total_lessons > 0 and completed_lessons == total_lessons:
-            # Mark enrollment as completed
-            if not enrollment.completed_at:
-                enrollment.completed_at = timezone.now()
-                enrollment.save()
-            
-            # Trigger async task
-            from apps.courses.tasks import send_course_completion_notification
-            send_course_completion_notification.delay(enrollment.id)
+        # Decided by the frontier, which lesson changes keep current at once; the
+        # counters can hold lessons removed since until the backfill job runs
+        state = Enrollment.objects.filter(pk=enrollment.pk).values(
+            'frontier_order', 'completed_at', 'course__lesson_count'
+        ).get()
+        
+        if state['course__lesson_count'] > 0 and state['frontier_order'] is None and not state['completed_at']:
+            # Mark enrollment as completed; the guard lets only one concurrent request do it
+            completed_at = timezone.now()
+            with transaction.atomic():
+                marked = Enrollment.objects.filter(
+                    pk=enrollment.pk, completed_at__isnull=True, frontier_order__isnull=True
+                ).update(completed_at=completed_at, updated_at=completed_at)
+                if marked:
+                    # The notification is sent by the outbox relay once this commits
+                    OutboxEvent.objects.enqueue(OutboxEvent.COURSE_COMPLETED, [enrollment.id])
+            if marked:
+                enrollment.completed_at = completed_at
@@ -0,0 +1,206 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a composite ordering.
+
+    The ordering is taken from the view's `cursor_ordering` attribute, falling back
+    to the model's `Meta.ordering`, and always ends with the primary key so that
+    rows sharing the same sort value are never skipped or repeated. Each page is
+    fetched with a `WHERE (a, b, id) < (...)` style predicate, so page N costs the
+    same as page 1 and no COUNT query is issued.
+    """
+    page_size = None
+    cursor_query_param = 'cursor'
+    page_size_query_param = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=None):
+        if page_size is not None:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset, view)
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['direction'] == 'previous'
+
+        ordering = [self._invert(field) for field in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._build_filter(ordering, cursor['position']))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_previous = cursor is not None
+            self.has_next = has_more
+        return self.page
+
+    def get_ordering(self, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or queryset.model._meta.ordering or ()
+        ordering = list(ordering)
+        pk_name = queryset.model._meta.pk.attname
+        if not any(field.lstrip('-') in ('pk', 'id', pk_name) for field in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append(f"-{pk_name}" if descending else pk_name)
+        return ordering
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor('next', self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor('previous', self.page[0])
+
+    def encode_cursor(self, direction, instance):
+        position = [self._get_field(field).value_to_string(instance) for field in self.ordering]
+        payload = json.dumps({'d': direction, 'p': position}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            direction = payload['d']
+            position = payload['p']
+            if direction not in ('next', 'previous') or len(position) != len(self.ordering):
+                raise ValueError
+            values = [
+                self._get_field(field).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return {'direction': direction, 'position': values}
+
+    def _build_filter(self, ordering, position):
+        """
+        Expand the row comparison `(f1, f2, f3) > (v1, v2, v3)` into
+        `f1 > v1 OR (f1 = v1 AND f2 > v2) OR (f1 = v1 AND f2 = v2 AND f3 > v3)`,
+        honouring the direction of every field.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = self._get_field(field).attname
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _get_field(self, field):
+        name = field.lstrip('-')
+        if name == 'pk':
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f"-{field}"
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
+
+
+class DefaultPagination(PageNumberPagination):
+    """
+    Page number pagination that switches to keyset pagination when the client
+    opts in with `?pagination=cursor` (or follows a link carrying a `cursor`).
+    Querysets ordered by an annotation, such as search results by rank, keep
+    page numbers: cursors hold model fields only, so keyset pages would lose
+    that order.
+    """
+    mode_query_param = 'pagination'
+
+    def _use_cursor(self, request, queryset):
+        if self._ordered_by_annotation(queryset):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    @staticmethod
+    def _ordered_by_annotation(queryset):
+        query = getattr(queryset, 'query', None)
+        if query is None:
+            return False
+        return any(isinstance(field, str) and field.lstrip('-') in query.annotations for field in query.order_by)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._use_cursor(request, queryset):
+            self.keyset = KeysetPagination(page_size=self.get_page_size(request) or self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Set to "cursor" to use keyset pagination instead of page numbers.',
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        })
+        return parameters + KeysetPagination().get_schema_operation_parameters(view)
@@ -57,12 +57,12 @@ INSTALLED_APPS += DJANGO_APP + THIRD_PARTY_APP
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.auth.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.DefaultPagination',
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -135,6 +135,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = ['apps.auth.backends.PooledModelBackend']
+
+# Hasher for new passwords: 'scrypt' (memory-hard, standard library), 'argon2' (memory-hard,
+# needs argon2-cffi) or 'pbkdf2'. Hashes made by the others still verify and are redone with
+# this one on the user's next successful login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+_PASSWORD_HASHERS = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Password checks at login run on this many threads per process (0 runs them in the request
+# thread); up to LOGIN_HASH_MAX_QUEUE more wait for LOGIN_HASH_QUEUE_TIMEOUT seconds at most,
+# further logins get a 429 until the burst drains
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+LOGIN_HASH_MAX_QUEUE = int(os.environ.get('LOGIN_HASH_MAX_QUEUE', 200))
+LOGIN_HASH_QUEUE_TIMEOUT = int(os.environ.get('LOGIN_HASH_QUEUE_TIMEOUT', 10))
+
+# Seconds an invite token (users imported without a password) can be used to choose a password
+INVITE_TOKEN_MAX_AGE = int(os.environ.get('INVITE_TOKEN_MAX_AGE', 14 * 24 * 3600))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -154,6 +179,57 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'course-platform',
+        }
+    }
+
+# Seconds a cached student catalog page or course detail is kept
+COURSE_CATALOG_CACHE_TIMEOUT = int(os.environ.get('COURSE_CATALOG_CACHE_TIMEOUT', 300))
+
+
+# Text search configuration used for course and lesson search vectors on PostgreSQL
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'english')
+
+
+# Number of course codes each process reserves from the database at a time
+COURSE_CODE_BLOCK_SIZE = int(os.environ.get('COURSE_CODE_BLOCK_SIZE', 20))
+
+
+# Lesson bodies of at least this many bytes are stored compressed. "zstd" needs the
+# optional zstandard package and falls back to "gzip"; "identity" disables compression.
+LESSON_CONTENT_CODEC = os.environ.get('LESSON_CONTENT_CODEC', 'zstd')
+LESSON_CONTENT_COMPRESSION_THRESHOLD = int(os.environ.get('LESSON_CONTENT_COMPRESSION_THRESHOLD', 1024))
+
+
+# Bulk enrollment jobs: students accepted per request and enrolled per database round trip
+BULK_ENROLLMENT_MAX_STUDENTS = int(os.environ.get('BULK_ENROLLMENT_MAX_STUDENTS', 100000))
+BULK_ENROLLMENT_CHUNK_SIZE = int(os.environ.get('BULK_ENROLLMENT_CHUNK_SIZE', 2000))
+
+# Enrollments updated per transaction when lessons are added, reordered or deleted
+PROGRESS_BACKFILL_CHUNK_SIZE = int(os.environ.get('PROGRESS_BACKFILL_CHUNK_SIZE', 1000))
+
+# Completions accepted by one POST /api/progress/batch_complete/ request
+PROGRESS_BATCH_MAX_ITEMS = int(os.environ.get('PROGRESS_BATCH_MAX_ITEMS', 500))
+
+# Lesson completion is always kept in the bitset on Enrollment; "rows" also writes a
+# LessonProgress row per completed lesson, "bitset" keeps completions only in the bitset
+LESSON_PROGRESS_STORE = os.environ.get('LESSON_PROGRESS_STORE', 'rows')
+
+
 
 
 # Celery Configuration
@@ -164,13 +240,96 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Outbox events published per relay transaction, and how often Celery beat runs the relay (seconds)
+OUTBOX_RELAY_BATCH_SIZE = int(os.environ.get('OUTBOX_RELAY_BATCH_SIZE', 500))
+OUTBOX_RELAY_INTERVAL = float(os.environ.get('OUTBOX_RELAY_INTERVAL', 2))
+
+CELERY_BEAT_SCHEDULE = {
+    'relay-outbox': {
+        'task': 'apps.courses.tasks.relay_outbox',
+        'schedule': OUTBOX_RELAY_INTERVAL,
+    },
+}
+
+from kombu import Queue
+
+# Queue topology. Short, latency-sensitive tasks never wait behind long batch jobs:
+#   default        outbox relay and anything not routed below
+#   notifications  completion emails
+#   bulk           bulk enrollment and progress backfill jobs (minutes long, resumable)
+# Run one worker for default,notifications and another for bulk, see docker-compose.yml.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = [Queue('default'), Queue('notifications'), Queue('bulk')]
+
+# Priorities order tasks within a queue, 0 first (Redis emulates them with one list per step)
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    # Unacknowledged acks_late messages are redelivered after this many seconds; keep it above every time_limit
+    'visibility_timeout': 3600,
+}
+
+CELERY_TASK_ROUTES = {
+    'apps.courses.tasks.relay_outbox': {'queue': 'default', 'priority': 0},
+    'apps.courses.tasks.send_course_completion_notifications': {'queue': 'notifications', 'priority': 3},
+    'apps.courses.tasks.send_course_completion_notification': {'queue': 'notifications', 'priority': 3},
+    'apps.courses.tasks.process_progress_backfill': {'queue': 'bulk', 'priority': 4},
+    'apps.courses.tasks.process_bulk_enrollment': {'queue': 'bulk', 'priority': 6},
+}
+
+# Completion email tasks started per minute by each worker; every task carries up to
+# OUTBOX_RELAY_BATCH_SIZE messages, so this caps the load on the SMTP relay
+NOTIFICATION_TASK_RATE_LIMIT = os.environ.get('NOTIFICATION_TASK_RATE_LIMIT', '30/m')
+
+# Per-task rate limits, time limits (soft raises SoftTimeLimitExceeded, hard kills the
+# process) and acknowledgement. Long jobs resume from their cursor, so they ack late and
+# are redelivered if a worker dies; short tasks ack on receipt.
+CELERY_TASK_ANNOTATIONS = {
+    'apps.courses.tasks.relay_outbox': {'soft_time_limit': 30, 'time_limit': 60},
+    'apps.courses.tasks.send_course_completion_notifications': {
+        'rate_limit': NOTIFICATION_TASK_RATE_LIMIT, 'soft_time_limit': 120, 'time_limit': 180,
+    },
+    'apps.courses.tasks.send_course_completion_notification': {'soft_time_limit': 30, 'time_limit': 60},
+    'apps.courses.tasks.process_progress_backfill': {
+        'soft_time_limit': 1800, 'time_limit': 1900, 'acks_late': True, 'reject_on_worker_lost': True,
+    },
+    'apps.courses.tasks.process_bulk_enrollment': {
+        'soft_time_limit': 1800, 'time_limit': 1900, 'acks_late': True, 'reject_on_worker_lost': True,
+    },
+}
+
+# Messages each worker process reserves ahead. Workers for short tasks keep the default;
+# the bulk worker runs with --prefetch-multiplier=1 so one long job never holds back others
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.environ.get('CELERY_WORKER_PREFETCH_MULTIPLIER', 4))
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=12000),  # Set access token lifetime
+    # Short-lived so a leaked access token is useful only briefly; logout revokes it early
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('ACCESS_TOKEN_LIFETIME_MINUTES', 30))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=9),    
+    'TOKEN_REFRESH_SERIALIZER': 'apps.auth.serializers.RevocableTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'apps.auth.serializers.RevocableTokenVerifySerializer',
 }
 
+# Revoked tokens each process's Bloom filter is sized for (it is rebuilt larger when
+# exceeded) and its false-positive rate; a false positive costs one query
+TOKEN_REVOCATION_FILTER_CAPACITY = int(os.environ.get('TOKEN_REVOCATION_FILTER_CAPACITY', 100000))
+TOKEN_REVOCATION_FILTER_ERROR_RATE = float(os.environ.get('TOKEN_REVOCATION_FILTER_ERROR_RATE', 0.001))
+
+# How often Celery beat deletes revoked tokens past their expiry (seconds)
+TOKEN_REVOCATION_PURGE_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_PURGE_INTERVAL', 3600))
+CELERY_BEAT_SCHEDULE['purge-revoked-tokens'] = {
+    'task': 'apps.auth.tasks.purge_revoked_tokens',
+    'schedule': TOKEN_REVOCATION_PURGE_INTERVAL,
+}
+
+# Seconds a user's is_active/is_staff/role is cached for token authentication; saving
+# the user drops it at once, queryset updates that skip signals take up to this long
+AUTH_USER_STATE_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_STATE_CACHE_TIMEOUT', 60))
+
 
 # Email Configuration (for course completion notifications)
 
@@ -181,6 +340,12 @@ EMAIL_PORT = os.environ.get('EMAIL_PORT')
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 10))
+
+# Completion emails failing transiently are retried this many times, waiting
+# NOTIFICATION_EMAIL_RETRY_DELAY seconds before the first retry and doubling it after each
+NOTIFICATION_EMAIL_MAX_RETRIES = int(os.environ.get('NOTIFICATION_EMAIL_MAX_RETRIES', 5))
+NOTIFICATION_EMAIL_RETRY_DELAY = int(os.environ.get('NOTIFICATION_EMAIL_RETRY_DELAY', 10))
 
 
 
@@ -193,7 +358,7 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': '/api/',
     'AUTHENTICATION_WHITELIST': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.auth.authentication.StatelessJWTAuthentication',
     ],
     'SWAGGER_UI_SETTINGS': {
         'deepLinking': True,